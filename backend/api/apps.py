@@ -1,6 +1,21 @@
+import threading
+
 from django.apps import AppConfig
+from django.conf import settings
+
+from foodgram.logging import telegram_handler
 
 
 class ApiConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'api'
+
+    def ready(self):
+        from api import signals  # noqa: F401
+
+        if settings.TELEGRAM_STARTUP_MESSAGE:
+            # Сеть не должна задерживать запуск процесса
+            threading.Thread(
+                target=telegram_handler.send_initial_message,
+                name='telegram-startup', daemon=True
+            ).start()
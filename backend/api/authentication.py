@@ -0,0 +1,75 @@
+import copy
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from rest_framework.authentication import TokenAuthentication
+
+from recipes import versions
+
+
+class TokenCache:
+    """
+    Ограниченный по размеру кеш токен -> пользователь в памяти процесса.
+    Давно не использованные записи вытесняются первыми.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry[0] < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return entry[1]
+
+    def set(self, key, value):
+        with self._lock:
+            self._entries[key] = (
+                time.monotonic() + settings.TOKEN_AUTH_CACHE_TIMEOUT, value
+            )
+            self._entries.move_to_end(key)
+            while len(self._entries) > settings.TOKEN_AUTH_CACHE_SIZE:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+token_cache = TokenCache()
+
+
+class CachingTokenAuthentication(TokenAuthentication):
+    """
+    Аутентификация по токену без запроса к БД на каждый запрос.
+    Запись кеша действует, пока не истёк её срок и не сменился штамп
+    версии учётных данных пользователя: он меняется при удалении
+    токена (выход) и при сохранении пользователя (например, отключении).
+
+    Кеш включается только с общим для всех процессов кешем штампов:
+    иначе выход в одном воркере не был бы виден в остальных. С кешем
+    в памяти процесса (по умолчанию) каждый запрос проверяет токен в БД.
+    """
+    cache = token_cache
+
+    def authenticate_credentials(self, key):
+        if not versions.is_shared():
+            return super().authenticate_credentials(key)
+        entry = self.cache.get(key)
+        if entry is not None:
+            user, token, version = entry
+            if version == versions.get_version(versions.user_auth(user.id)):
+                return copy.copy(user), token
+        user, token = super().authenticate_credentials(key)
+        self.cache.set(key, (
+            user, token, versions.get_version(versions.user_auth(user.id))
+        ))
+        return copy.copy(user), token
@@ -0,0 +1,220 @@
+import base64
+import binascii
+import tempfile
+import uuid
+
+import filetype
+from django.conf import settings
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.core.files.uploadedfile import UploadedFile
+from drf_extra_fields.fields import Base64ImageField
+from PIL import Image
+from rest_framework import serializers
+from rest_framework.relations import MANY_RELATION_KWARGS, ManyRelatedField
+from rest_framework.settings import api_settings
+
+from recipes.images import rendition_urls
+from recipes.tag_catalog import tag_catalog
+
+
+class BulkPrimaryKeyRelatedField(serializers.PrimaryKeyRelatedField):
+    """
+    Поле первичного ключа, которое в списке проверяет все id
+    одним запросом id__in и сообщает обо всех отсутствующих сразу.
+    """
+    default_error_messages = {
+        'does_not_exist_many': 'Объекты с id {pk_values} не существуют.',
+    }
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.resolved = None
+
+    @classmethod
+    def many_init(cls, *args, **kwargs):
+        list_kwargs = {'child_relation': cls(*args, **kwargs)}
+        for key in kwargs:
+            if key in MANY_RELATION_KWARGS:
+                list_kwargs[key] = kwargs[key]
+        return BulkManyRelatedField(**list_kwargs)
+
+    def to_pk(self, data):
+        if isinstance(data, bool):
+            self.fail('incorrect_type', data_type=type(data).__name__)
+        try:
+            return self.get_queryset().model._meta.pk.to_python(data)
+        except (TypeError, ValueError, DjangoValidationError):
+            self.fail('incorrect_type', data_type=type(data).__name__)
+
+    def resolve(self, data):
+        """
+        Загружает объекты по списку id одним запросом.
+        Значения неверного типа пропускаются: о них сообщит проверка
+        конкретного элемента.
+        """
+        pks = []
+        for value in data:
+            try:
+                pks.append(self.to_pk(value))
+            except serializers.ValidationError:
+                continue
+        objects = self.get_queryset().in_bulk(pks)
+        missing = [pk for pk in dict.fromkeys(pks) if pk not in objects]
+        if missing:
+            self.fail(
+                'does_not_exist_many',
+                pk_values=', '.join(str(pk) for pk in missing)
+            )
+        return objects
+
+    def to_internal_value(self, data):
+        if self.resolved is None:
+            return super().to_internal_value(data)
+        pk = self.to_pk(data)
+        if pk not in self.resolved:
+            self.fail('does_not_exist', pk_value=pk)
+        return self.resolved[pk]
+
+
+class BulkManyRelatedField(ManyRelatedField):
+    """
+    Список BulkPrimaryKeyRelatedField, проверяемый одним запросом.
+    """
+    def to_internal_value(self, data):
+        if isinstance(data, str) or not hasattr(data, '__iter__'):
+            self.fail('not_a_list', input_type=type(data).__name__)
+        if not self.allow_empty and len(data) == 0:
+            self.fail('empty')
+        self.child_relation.resolved = self.child_relation.resolve(data)
+        return [
+            self.child_relation.to_internal_value(item)
+            for item in data
+        ]
+
+
+class BulkRelatedListSerializer(serializers.ListSerializer):
+    """
+    Список вложенных сериализаторов, в котором поля
+    BulkPrimaryKeyRelatedField всех элементов проверяются заранее,
+    одним запросом на каждое поле.
+    """
+    def to_internal_value(self, data):
+        if isinstance(data, list):
+            for name, field in self.child.fields.items():
+                if not isinstance(field, BulkPrimaryKeyRelatedField):
+                    continue
+                values = [
+                    item[name] for item in data
+                    if isinstance(item, dict) and name in item
+                ]
+                try:
+                    field.resolved = field.resolve(values)
+                except serializers.ValidationError as error:
+                    raise serializers.ValidationError(
+                        {api_settings.NON_FIELD_ERRORS_KEY: error.detail}
+                    )
+        return super().to_internal_value(data)
+
+
+class StreamingBase64ImageField(Base64ImageField):
+    """
+    Картинка в base64, которая декодируется частями во временный файл
+    вместо копии целиком в памяти. Размер проверяется до декодирования.
+    """
+    CHUNK_SIZE = 4 * 2**16
+    default_error_messages = {
+        'too_large': 'Размер картинки превышает {max_size} байт.',
+    }
+
+    def to_internal_value(self, base64_data):
+        if base64_data in self.EMPTY_VALUES:
+            return None
+        if not isinstance(base64_data, str):
+            return super().to_internal_value(base64_data)
+
+        header, _, base64_data = base64_data.rpartition(';base64,')
+        content_type = None
+        if header and self.trust_provided_content_type:
+            content_type = header.replace('data:', '')
+        if len(base64_data) // 4 * 3 > settings.IMAGE_MAX_UPLOAD_SIZE:
+            self.fail('too_large', max_size=settings.IMAGE_MAX_UPLOAD_SIZE)
+
+        decoded_file = self.decode(base64_data)
+        size = decoded_file.tell()
+        decoded_file.seek(0)
+        file_extension = self.get_file_extension(
+            None, decoded_file.read(261)
+        )
+        decoded_file.seek(0)
+        if file_extension not in self.ALLOWED_TYPES:
+            decoded_file.close()
+            raise serializers.ValidationError(self.INVALID_TYPE_MESSAGE)
+
+        # Проверка самим Pillow: ImageField формы прочитал бы файл
+        # в память целиком.
+        try:
+            Image.open(decoded_file).verify()
+        except Exception:
+            decoded_file.close()
+            raise serializers.ValidationError(self.INVALID_FILE_MESSAGE)
+        decoded_file.seek(0)
+        return UploadedFile(
+            file=decoded_file,
+            name=f'{uuid.uuid4()}.{file_extension}',
+            content_type=content_type,
+            size=size,
+        )
+
+    def decode(self, base64_data):
+        decoded_file = tempfile.SpooledTemporaryFile(
+            max_size=settings.IMAGE_SPOOL_MAX_SIZE
+        )
+        try:
+            for start in range(0, len(base64_data), self.CHUNK_SIZE):
+                decoded_file.write(base64.b64decode(
+                    base64_data[start:start + self.CHUNK_SIZE],
+                    validate=True
+                ))
+        except (TypeError, binascii.Error, ValueError):
+            decoded_file.close()
+            raise serializers.ValidationError(self.INVALID_FILE_MESSAGE)
+        return decoded_file
+
+    def get_file_extension(self, filename, decoded_file):
+        extension = filetype.guess_extension(decoded_file)
+        if extension is None:
+            raise serializers.ValidationError(self.INVALID_FILE_MESSAGE)
+        return 'jpg' if extension == 'jpeg' else extension
+
+
+class RenditionImageField(serializers.ImageField):
+    """
+    Ссылка на WebP-вариант картинки рецепта. Пока вариант не готов,
+    отдаётся ссылка на оригинал.
+    """
+    def __init__(self, rendition, **kwargs):
+        self.rendition = rendition
+        kwargs['source'] = '*'
+        kwargs['read_only'] = True
+        super().__init__(**kwargs)
+
+    def to_representation(self, recipe):
+        url = rendition_urls(recipe).get(self.rendition)
+        if url is None:
+            return super().to_representation(recipe.image)
+        request = self.context.get('request')
+        if request is not None:
+            return request.build_absolute_uri(url)
+        return url
+
+
+class CatalogTagsField(serializers.Field):
+    """
+    Теги рецепта из справочника в памяти: из БД нужны только их id.
+    """
+    def __init__(self, **kwargs):
+        kwargs['read_only'] = True
+        super().__init__(**kwargs)
+
+    def to_representation(self, tags):
+        return tag_catalog.represent(tag.id for tag in tags.all())
@@ -1,9 +1,20 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.utils import timezone
 from django_filters import rest_framework as filters
 from rest_framework.filters import SearchFilter
 
-from recipes.models import Tag, Recipe
+from recipes.ingredient_index import ingredient_index
+from recipes.models import Recipe
+from recipes.search import search_ingredients_fuzzy, search_recipes
+from recipes.tag_catalog import tag_catalog
 from users.models import User
 
+# Самый длинный период для сортировки по популярности, дней.
+# Сортировка за период не использует индекс, см. order_by_popularity.
+MAX_POPULAR_DAYS = 365
+
 
 class IngredientSearchFilter(SearchFilter):
     """
@@ -12,14 +23,45 @@ class IngredientSearchFilter(SearchFilter):
     search_param = 'name'
 
 
+class IngredientAutocompleteFilter(IngredientSearchFilter):
+    """
+    Поиск ингредиентов по началу имени через индекс в памяти процесса.
+    С параметром ?fuzzy=true выполняется нечёткий поиск в БД.
+    """
+    fuzzy_param = 'fuzzy'
+
+    def is_fuzzy(self, request):
+        value = request.query_params.get(self.fuzzy_param, '')
+        return value.lower() in ('1', 'true')
+
+    def filter_queryset(self, request, queryset, view):
+        search_terms = self.get_search_terms(request)
+        if not search_terms or view.action != 'list':
+            return queryset
+        if self.is_fuzzy(request):
+            return search_ingredients_fuzzy(
+                queryset, ' '.join(search_terms)
+            )[:settings.INGREDIENT_SEARCH_LIMIT]
+        return ingredient_index.search(
+            search_terms, limit=settings.INGREDIENT_SEARCH_LIMIT
+        )
+
+
+def tag_slug_choices():
+    """
+    Варианты фильтра по тегам из справочника в памяти.
+    Функция, а не метод справочника: фильтры копируются через deepcopy.
+    """
+    return tag_catalog.slug_choices()
+
+
 class RecipesFilter(filters.FilterSet):
     """
     Набор фильтров для рецептов.
     """
-    tags = filters.ModelMultipleChoiceFilter(
-        queryset=Tag.objects.all(),
-        field_name='tags__slug',
-        to_field_name='slug',
+    tags = filters.MultipleChoiceFilter(
+        choices=tag_slug_choices,
+        method='get_tags',
         label='Теги',
         help_text='Фильтр рецептов по тегам.'
     )
@@ -38,10 +80,48 @@ class RecipesFilter(filters.FilterSet):
         label='В корзине',
         help_text='Фильтр рецептов, которые находятся в корзине покупок.'
     )
+    search = filters.CharFilter(
+        method='get_search',
+        label='Поиск',
+        help_text='Поиск рецептов по названию и описанию.'
+    )
+    popular_days = filters.NumberFilter(
+        method='get_popular_days',
+        min_value=1,
+        max_value=MAX_POPULAR_DAYS,
+        label='Период популярности',
+        help_text='Число дней, за которые считается популярность.'
+    )
+    ordering = filters.ChoiceFilter(
+        method='get_ordering',
+        choices=(
+            ('newest', 'Сначала новые'),
+            ('popular', 'Сначала популярные'),
+            ('quickest', 'Сначала быстрые'),
+        ),
+        label='Сортировка',
+        help_text='Сортировка рецептов.'
+    )
 
     class Meta:
         model = Recipe
-        fields = ('tags', 'author', 'is_favorited', 'is_in_shopping_cart')
+        fields = (
+            'tags', 'author', 'is_favorited', 'is_in_shopping_cart', 'search',
+            'popular_days', 'ordering'
+        )
+
+    def __init__(self, data=None, *args, **kwargs):
+        super().__init__(data, *args, **kwargs)
+        if hasattr(data, 'getlist'):
+            # Варианты тегов проверяются по справочнику в памяти:
+            # новый тег из другого процесса должен попасть в них.
+            tag_catalog.ensure_slugs(data.getlist('tags'))
+
+    def get_tags(self, queryset, name, value):
+        """
+        Фильтр рецептов, у которых есть хотя бы один из тегов.
+        """
+        return queryset.with_any_tag(tag_catalog.ids_for_slugs(value))
 
     def get_is_favorited(self, queryset, name, value):
         """
@@ -60,3 +140,29 @@ class RecipesFilter(filters.FilterSet):
         if value and user.is_authenticated:
             return queryset.filter(shoppingcart_recipe__user=user)
         return queryset
+
+    def get_search(self, queryset, name, value):
+        """
+        Поиск рецептов по названию и описанию.
+        """
+        if value:
+            return search_recipes(queryset, value)
+        return queryset
+
+    def get_popular_days(self, queryset, name, value):
+        """
+        Период учитывается в сортировке по популярности.
+        """
+        return queryset
+
+    def get_ordering(self, queryset, name, value):
+        """
+        Сортировка рецептов: новые, популярные или быстрые.
+        """
+        if value == 'popular':
+            days = self.form.cleaned_data.get('popular_days')
+            since = timezone.now() - timedelta(days=int(days)) if days else None
+            return queryset.order_by_popularity(since)
+        if value == 'quickest':
+            return queryset.order_by('cooking_time', '-pub_date', '-id')
+        return queryset.order_by('-pub_date', '-id')
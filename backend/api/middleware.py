@@ -1,7 +1,5 @@
 import logging
 
-from foodgram.logging import telegram_handler
-
 logger = logging.getLogger(__name__)
 
 
@@ -13,13 +11,10 @@ class ExceptionLoggingMiddleware:
         try:
             response = self.get_response(request)
             return response
-        except Exception as e:
+        except Exception:
+            # Запись уходит в Telegram через обработчик корневого логгера,
+            # отдельная отправка дублировала бы её.
             logger.exception('Произошло необработанное исключение')
-            telegram_handler.emit(logging.makeLogRecord({
-                'msg': f'Произошло необработанное исключение: {str(e)}',
-                'levelname': 'ERROR',
-                'name': __name__
-            }))
             raise
 
     def process_exception(self, request, exception):
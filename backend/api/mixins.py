@@ -0,0 +1,101 @@
+import hashlib
+import math
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+from rest_framework.response import Response
+
+from recipes import versions
+
+
+class AnonymousListCacheMixin:
+    """
+    Кеширует ответ списка для анонимных пользователей.
+
+    Ключ строится из версии данных и нормализованной строки запроса,
+    в которую попадают только параметры из list_cache_params.
+    При изменении данных версия меняется и старые записи не читаются.
+    """
+    list_cache_version = None
+    list_cache_params = ()
+
+    def get_list_cache_key(self, request):
+        params = sorted(
+            (name, value)
+            for name in self.list_cache_params
+            for value in request.query_params.getlist(name)
+        )
+        # Ссылки пагинации абсолютные, поэтому хост тоже входит в ключ
+        params.append(('host', request.get_host()))
+        digest = hashlib.md5(repr(params).encode()).hexdigest()
+        version = versions.get_version(self.list_cache_version)
+        return f'{self.basename}_list:{version}:{digest}'
+
+    def list(self, request, *args, **kwargs):
+        if not request.user.is_anonymous:
+            return super().list(request, *args, **kwargs)
+        key = self.get_list_cache_key(request)
+        data = cache.get(key)
+        if data is not None:
+            return Response(data)
+        response = super().list(request, *args, **kwargs)
+        if response.status_code == 200:
+            cache.set(key, response.data, settings.LIST_CACHE_TIMEOUT)
+        return response
+
+
+class ConditionalGetMixin:
+    """
+    Условные GET-запросы по штампам версий данных.
+
+    ETag вычисляется из версий наборов данных без запросов к БД, поэтому
+    при совпадении If-None-Match ответ 304 возвращается до выборки
+    и сериализации. Last-Modified отдаётся вместе с ETag только для
+    сведения: с точностью до секунды он не различает два изменения
+    в одну секунду, поэтому If-Modified-Since не проверяется.
+
+    Работает только с общим для всех процессов кешем: штампы из кеша
+    в памяти процесса не знают об изменениях в других воркерах, и ответ
+    304 мог бы подтвердить устаревшие данные.
+    """
+    conditional_versions = ()
+    conditional_actions = ('list', 'retrieve')
+    # Ответ зависит от избранного, корзины и подписок пользователя
+    conditional_per_user = False
+
+    def get_conditional_stamps(self, request):
+        names = list(self.conditional_versions)
+        user = request.user
+        if self.conditional_per_user and user.is_authenticated:
+            names.append(versions.user_data(user.id))
+        return [versions.get_version(name) for name in names]
+
+    def conditional(self, handler, request, *args, **kwargs):
+        if not versions.is_shared():
+            return handler(request, *args, **kwargs)
+        stamps = self.get_conditional_stamps(request)
+        etag = quote_etag(hashlib.md5(repr((
+            request.get_full_path(),
+            request.user.id,
+            request.accepted_media_type,
+            stamps,
+        )).encode()).hexdigest())
+        response = get_conditional_response(request, etag=etag)
+        if response is None:
+            response = handler(request, *args, **kwargs)
+        if response.status_code in (200, 304):
+            response['ETag'] = etag
+            response['Last-Modified'] = http_date(math.ceil(max(stamps)))
+        return response
+
+    def list(self, request, *args, **kwargs):
+        if 'list' not in self.conditional_actions:
+            return super().list(request, *args, **kwargs)
+        return self.conditional(super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        if 'retrieve' not in self.conditional_actions:
+            return super().retrieve(request, *args, **kwargs)
+        return self.conditional(super().retrieve, request, *args, **kwargs)
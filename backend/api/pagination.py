@@ -1,6 +1,321 @@
-from rest_framework.pagination import PageNumberPagination
+import hashlib
+import json
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import EmptyResultSet, FieldDoesNotExist
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.core.paginator import EmptyPage, Paginator
+from django.db import connections
+from django.db.models import Q
+from django.utils.functional import cached_property
+from rest_framework.exceptions import NotFound, ValidationError
+from rest_framework.pagination import (Cursor, CursorPagination,
+                                       PageNumberPagination)
+from rest_framework.response import Response
+
+
+class CachedCountPaginator(Paginator):
+    """
+    Пагинатор с кешированием COUNT(*).
+
+    Количество кешируется по SQL-запросу подсчёта с параметрами и штампам
+    версий данных, от которых оно зависит (versions), на
+    PAGINATION_COUNT_CACHE_TIMEOUT секунд: любое изменение данных меняет
+    штамп, и старое количество больше не читается. Без штампов количество
+    не кешируется. Для таблицы без фильтров в PostgreSQL берётся оценка
+    reltuples из статистики, если она не меньше
+    PAGINATION_ESTIMATE_THRESHOLD. Атрибут count_is_exact показывает,
+    посчитано ли количество точно.
+
+    Если запрошенная страница выходит за число страниц по кешу или
+    оценке, количество пересчитывается точно, а не отдаётся 404.
+    """
+    count_is_exact = True
+
+    def __init__(self, *args, versions=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.versions = versions
+        # Количество взято из кеша или оценки и может отставать от данных
+        self.count_is_shortcut = False
+        self.force_exact = False
+
+    def get_estimate(self, queryset):
+        connection = connections[queryset.db]
+        if connection.vendor != 'postgresql' or queryset.query.where:
+            return None
+        with connection.cursor() as cursor:
+            cursor.execute(
+                'SELECT reltuples::bigint FROM pg_class '
+                'WHERE oid = %s::regclass',
+                [queryset.model._meta.db_table]
+            )
+            row = cursor.fetchone()
+        if row is None or row[0] < settings.PAGINATION_ESTIMATE_THRESHOLD:
+            return None
+        return row[0]
+
+    def get_count_queryset(self):
+        """
+        Запрос для подсчёта без сортировки, select_related и неагрегатных
+        аннотаций. Аннотации пользователя (is_favorited и другие) не меняют
+        число строк, и без них у всех пользователей с одинаковыми фильтрами
+        общий ключ кеша. Фильтр по аннотации остаётся в WHERE.
+        """
+        queryset = self.object_list.all()
+        query = queryset.query
+        query.clear_ordering(force_empty=True)
+        query.select_related = False
+        removed = {
+            name for name, annotation in query.annotations.items()
+            if not annotation.contains_aggregate
+        }
+        for name in removed:
+            del query.annotations[name]
+        if query.annotation_select_mask is not None:
+            query.set_annotation_mask(query.annotation_select_mask - removed)
+        return queryset
+
+    def get_count_key(self, queryset):
+        sql, params = queryset.query.sql_with_params()
+        return 'pagination_count:' + hashlib.md5(
+            repr((queryset.db, sql, params, self.versions)).encode()
+        ).hexdigest()
+
+    @cached_property
+    def count(self):
+        queryset = self.get_count_queryset()
+        try:
+            key = self.get_count_key(queryset)
+        except EmptyResultSet:
+            return 0
+        self.count_is_shortcut = not self.force_exact
+        if self.count_is_shortcut and self.versions is not None:
+            cached = cache.get(key)
+            if cached is not None:
+                count, self.count_is_exact = cached
+                return count
+        count = self.get_estimate(queryset) if self.count_is_shortcut else None
+        if count is None:
+            count = queryset.count()
+            self.count_is_shortcut = False
+        self.count_is_exact = not self.count_is_shortcut
+        if self.versions is not None:
+            cache.set(
+                key,
+                (count, self.count_is_exact),
+                settings.PAGINATION_COUNT_CACHE_TIMEOUT
+            )
+        return count
+
+    def validate_number(self, number):
+        try:
+            return super().validate_number(number)
+        except EmptyPage:
+            if not self.count_is_shortcut:
+                raise
+        # Количество из кеша или оценки могло отстать от данных.
+        self.force_exact = True
+        del self.count
+        self.__dict__.pop('num_pages', None)
+        return super().validate_number(number)
+
+
+class KeysetPagination(CursorPagination):
+    """
+    Пагинация по курсору без OFFSET и COUNT(*).
+
+    Порядок берётся из запроса, если он задан явно (например, параметром
+    ordering), иначе из атрибута cursor_ordering представления. Курсор
+    хранит значения всех полей сортировки крайней строки страницы, а
+    последним полем сортировки всегда идёт уникальное (по умолчанию pk),
+    поэтому строки с равными значениями не теряются и не повторяются.
+    Сортировка по аннотациям (популярность за период, схожесть при
+    поиске) курсором не поддерживается.
+    """
+    page_size = 6
+    page_size_query_param = 'limit'
+    ordering = ('-pub_date', '-id')
+    unsupported_ordering_message = (
+        'Пагинация по курсору недоступна для этой сортировки.'
+    )
+
+    def get_ordering(self, request, queryset, view):
+        if queryset.query.order_by:
+            return tuple(queryset.query.order_by)
+        return getattr(view, 'cursor_ordering', self.ordering)
+
+    def get_key_field(self, model, item):
+        """
+        Поле модели для элемента сортировки. Подходят только собственные
+        поля без NULL: по их значениям строится условие курсора.
+        """
+        if not isinstance(item, str):
+            raise ValidationError({'cursor': self.unsupported_ordering_message})
+        name = item.lstrip('-')
+        try:
+            field = (
+                model._meta.pk if name == 'pk'
+                else model._meta.get_field(name)
+            )
+        except FieldDoesNotExist:
+            field = None
+        if (
+            field is None or not field.concrete or field.null
+            or (field.is_relation and name != field.attname)
+        ):
+            raise ValidationError({'cursor': self.unsupported_ordering_message})
+        return field
+
+    def get_keys(self, model, ordering):
+        """
+        Поля сортировки с направлением (field, descending); если последнее
+        поле не уникально, добавляется pk в том же направлении.
+        """
+        keys = [
+            (self.get_key_field(model, item), item.startswith('-'))
+            for item in ordering
+        ]
+        field, descending = keys[-1]
+        if not field.unique:
+            keys.append((model._meta.pk, descending))
+        return keys
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.page_size = self.get_page_size(request)
+        if not self.page_size:
+            return None
+        self.base_url = request.build_absolute_uri()
+        self.keys = self.get_keys(
+            queryset.model, self.get_ordering(request, queryset, view)
+        )
+        self.cursor = self.decode_cursor(request)
+        reverse = self.cursor is not None and self.cursor.reverse
+        position = self.cursor.position if self.cursor else None
+        queryset = queryset.order_by(*(
+            ('-' if descending != reverse else '') + field.attname
+            for field, descending in self.keys
+        ))
+        if position is not None:
+            queryset = queryset.filter(
+                self.get_position_filter(self.decode_position(position), reverse)
+            )
+        results = list(queryset[:self.page_size + 1])
+        self.page = results[:self.page_size]
+        has_more = len(results) > self.page_size
+        if reverse:
+            self.page.reverse()
+            self.has_next, self.has_previous = True, has_more
+        else:
+            self.has_next, self.has_previous = has_more, position is not None
+        return self.page
+
+    def get_position_filter(self, values, reverse):
+        """
+        Строки после позиции в порядке сортировки:
+        (f1 > v1) OR (f1 = v1 AND f2 > v2) OR ...
+        """
+        condition, equal = Q(), Q()
+        for (field, descending), value in zip(self.keys, values):
+            lookup = 'lt' if descending != reverse else 'gt'
+            condition |= equal & Q(**{f'{field.attname}__{lookup}': value})
+            equal &= Q(**{field.attname: value})
+        return condition
+
+    def encode_position(self, instance):
+        return json.dumps([
+            field.value_to_string(instance) for field, _ in self.keys
+        ])
+
+    def decode_position(self, position):
+        try:
+            values = json.loads(position)
+            if not isinstance(values, list) or len(values) != len(self.keys):
+                raise ValueError
+            return [
+                field.to_python(value)
+                for (field, _), value in zip(self.keys, values)
+            ]
+        except (TypeError, ValueError, DjangoValidationError):
+            raise NotFound(self.invalid_cursor_message)
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        if self.page:
+            position = self.encode_position(self.page[-1])
+        else:
+            # Перед страницей ничего не осталось - следующая будет первой
+            position = None
+        return self.encode_cursor(Cursor(offset=0, reverse=False,
+                                         position=position))
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        if self.page:
+            position = self.encode_position(self.page[0])
+        else:
+            position = self.cursor.position
+        return self.encode_cursor(Cursor(offset=0, reverse=True,
+                                         position=position))
+
+    def get_paginated_response(self, data):
+        # Формат ответа как у постраничной пагинации, count не считается
+        return Response(OrderedDict([
+            ('count', None),
+            ('next', self.get_next_link()),
+            ('previous', self.get_previous_link()),
+            ('results', data),
+        ]))
 
 
 class CustomPagination(PageNumberPagination):
+    """
+    Постраничная пагинация. Если в запросе есть параметр cursor
+    (для первой страницы - пустой), включается пагинация по курсору.
+    """
     page_size = 6
     page_size_query_param = 'limit'
+    cursor_query_param = 'cursor'
+
+    def __init__(self):
+        self.keyset_paginator = None
+        self.count_versions = None
+
+    def django_paginator_class(self, queryset, page_size):
+        # PageNumberPagination создаёт пагинатор через этот атрибут.
+        return CachedCountPaginator(
+            queryset, page_size, versions=self.count_versions
+        )
+
+    def get_count_versions(self, request, view):
+        """
+        Штампы версий данных, от которых зависит количество объектов,
+        из метода get_count_versions представления.
+        """
+        get_versions = getattr(view, 'get_count_versions', None)
+        if get_versions is None:
+            return None
+        return get_versions(request)
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if self.cursor_query_param in request.query_params:
+            self.keyset_paginator = KeysetPagination()
+            return self.keyset_paginator.paginate_queryset(
+                queryset, request, view
+            )
+        self.count_versions = self.get_count_versions(request, view)
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        if self.keyset_paginator is not None:
+            return self.keyset_paginator.get_paginated_response(data)
+        return Response(OrderedDict([
+            ('count', self.page.paginator.count),
+            ('count_is_exact', self.page.paginator.count_is_exact),
+            ('next', self.get_next_link()),
+            ('previous', self.get_previous_link()),
+            ('results', data),
+        ]))
@@ -1,12 +1,16 @@
 from django.conf import settings
-from django.db.models import F
 from django.core.validators import MaxValueValidator, MinValueValidator
+from django.db import transaction
 from rest_framework import serializers
-from rest_framework.fields import SerializerMethodField
 from rest_framework.validators import UniqueTogetherValidator
 from djoser.serializers import UserSerializer, UserCreateSerializer
 from drf_extra_fields.fields import Base64ImageField
 
+from api.fields import (BulkPrimaryKeyRelatedField, BulkRelatedListSerializer,
+                        CatalogTagsField, RenditionImageField,
+                        StreamingBase64ImageField)
+from recipes import versions
+from recipes.images import rendition_urls
 from recipes.models import (
     Favorite, Ingredient, IngredientAmount, Recipe,
     ShoppingCart, Tag
@@ -44,6 +48,9 @@ class CustomUserSerializer(UserSerializer):
         model = User
 
     def get_is_subscribed(self, obj):
+        subscribed = getattr(obj, 'subscribed', None)
+        if subscribed is not None:
+            return subscribed
         request = self.context.get('request')
         return (request
                 and request.user.is_authenticated
@@ -96,18 +103,19 @@ class AddIngredientToRecipeSerializer(serializers.ModelSerializer):
     """
     Ингредиенты.
     """
-    id = serializers.PrimaryKeyRelatedField(queryset=Ingredient.objects.all())
+    id = BulkPrimaryKeyRelatedField(queryset=Ingredient.objects.all())
 
     class Meta:
         model = IngredientAmount
         fields = ('id', 'amount')
+        list_serializer_class = BulkRelatedListSerializer
 
 
 class CreateRecipeSerializer(serializers.ModelSerializer):
     """
     Серелизатор создания рецепта.
     """
-    image = Base64ImageField()
+    image = StreamingBase64ImageField()
     author = CustomUserSerializer(read_only=True)
     ingredients = AddIngredientToRecipeSerializer(many=True)
     cooking_time = serializers.IntegerField(
@@ -116,7 +124,7 @@ class CreateRecipeSerializer(serializers.ModelSerializer):
             MaxValueValidator(settings.VALUE_RECIPE_MAX)
         ]
     )
-    tags = serializers.PrimaryKeyRelatedField(
+    tags = BulkPrimaryKeyRelatedField(
         queryset=Tag.objects.all(), many=True
     )
 
@@ -158,20 +166,52 @@ class CreateRecipeSerializer(serializers.ModelSerializer):
         ]
         IngredientAmount.objects.bulk_create(ingredients)
 
+    def update_ingredients(self, recipe, ingredients_data):
+        """
+        Сравнивает переданные ингредиенты с сохранёнными и выполняет
+        только нужные массовые вставку, обновление и удаление.
+        """
+        existing = {
+            item.ingredient_id: item
+            for item in IngredientAmount.objects.filter(recipe=recipe)
+        }
+        wanted = {
+            ingredient['id'].id: ingredient for ingredient in ingredients_data
+        }
+        removed = [
+            item.pk for ingredient_id, item in existing.items()
+            if ingredient_id not in wanted
+        ]
+        if removed:
+            IngredientAmount.objects.filter(pk__in=removed).delete()
+        changed = []
+        for ingredient_id, ingredient in wanted.items():
+            item = existing.get(ingredient_id)
+            if item is not None and item.amount != ingredient['amount']:
+                item.amount = ingredient['amount']
+                changed.append(item)
+        if changed:
+            IngredientAmount.objects.bulk_update(changed, ('amount',))
+        self.create_bulk(recipe, [
+            ingredient for ingredient_id, ingredient in wanted.items()
+            if ingredient_id not in existing
+        ])
+
+    @transaction.atomic
     def create(self, validated_data):
         ingredients_data = validated_data.pop('ingredients')
         tags_data = validated_data.pop('tags')
         author_id = self.context['request'].user.id
         recipe = Recipe.objects.create(author_id=author_id, **validated_data)
         recipe.tags.set(tags_data)
-        for ingredient_data in ingredients_data:
-            ingredient = ingredient_data['id']
-            amount = ingredient_data['amount']
-            IngredientAmount.objects.create(
-                recipe=recipe, ingredient=ingredient, amount=amount
-            )
+        self.create_bulk(recipe, ingredients_data)
+        # Массовая вставка не отправляет сигналы моделей.
+        transaction.on_commit(
+            lambda: versions.bump_version(versions.RECIPES)
+        )
         return recipe
 
+    @transaction.atomic
     def update(self, instance, validated_data):
         instance.name = validated_data.get('name', instance.name)
         instance.image = validated_data.get('image', instance.image)
@@ -181,14 +221,16 @@ class CreateRecipeSerializer(serializers.ModelSerializer):
         )
         instance.save()
 
-        tags_data = validated_data.pop('tags')
-        instance.tags.set(tags_data)
+        tags_data = validated_data.pop('tags', None)
+        if tags_data is not None:
+            instance.tags.set(tags_data)
 
         ingredients_data = validated_data.pop('ingredients', [])
         if ingredients_data:
-            instance.ingredients.clear()
-            self.create_bulk(instance, ingredients_data)
-
+            self.update_ingredients(instance, ingredients_data)
+        transaction.on_commit(
+            lambda: versions.bump_version(versions.RECIPES)
+        )
         return instance
 
 
@@ -196,11 +238,9 @@ class ShowRecipeSerializer(serializers.ModelSerializer):
     """
     Серелизатор представления рецепта.
     """
-    tags = TagSerializer(
-        read_only=True,
-        many=True
-    )
+    tags = CatalogTagsField()
     image = Base64ImageField()
+    renditions = serializers.SerializerMethodField()
     author = CustomUserSerializer(read_only=True)
     ingredients = serializers.SerializerMethodField()
     is_favorited = serializers.SerializerMethodField(
@@ -221,17 +261,39 @@ class ShowRecipeSerializer(serializers.ModelSerializer):
             'is_in_shopping_cart',
             'name',
             'image',
+            'renditions',
             'text',
             'cooking_time',
         ]
 
+    def to_representation(self, recipe):
+        # Передаём флаг подписки, посчитанный в запросе, сериализатору автора
+        is_author_subscribed = getattr(recipe, 'is_author_subscribed', None)
+        if is_author_subscribed is not None:
+            recipe.author.subscribed = is_author_subscribed
+        return super().to_representation(recipe)
+
     def get_ingredients(self, recipe):
-        ingredients = recipe.ingredients.values(
-            'id', 'name', 'measurement_unit', amount=F('recipe__amount')
-        )
-        return ingredients
+        return [
+            {
+                'id': item.ingredient.id,
+                'name': item.ingredient.name,
+                'measurement_unit': item.ingredient.measurement_unit,
+                'amount': item.amount,
+            }
+            for item in recipe.ingredient.all()
+        ]
+
+    def get_renditions(self, recipe):
+        request = self.context.get('request')
+        return {
+            key: request.build_absolute_uri(url) if request else url
+            for key, url in rendition_urls(recipe).items()
+        }
 
     def get_is_favorited(self, recipe):
+        if hasattr(recipe, 'is_favorited'):
+            return recipe.is_favorited
         user = self.context['request'].user
 
         if user.is_anonymous:
@@ -240,6 +302,8 @@ class ShowRecipeSerializer(serializers.ModelSerializer):
         return user.favorite.filter(recipe=recipe).exists()
 
     def get_is_in_shopping_cart(self, recipe):
+        if hasattr(recipe, 'is_in_shopping_cart'):
+            return recipe.is_in_shopping_cart
         user = self.context['request'].user
 
         if user.is_anonymous:
@@ -252,6 +316,8 @@ class RecipeForUserSerializer(serializers.ModelSerializer):
     """
     Сериализатор для рецептов пользователя.
     """
+    image = RenditionImageField('thumbnail')
+
     class Meta:
         model = Recipe
         fields = ('id', 'name', 'image', 'cooking_time')
@@ -280,7 +346,12 @@ class FavoriteSerializer(serializers.ModelSerializer):
         """
         request = self.context.get('request')
         context = {'request': request}
-        return ShowRecipeSerializer(instance.recipe, context=context).data
+        recipe = (
+            Recipe.objects.with_related()
+            .add_user_annotations(request.user)
+            .get(pk=instance.recipe_id)
+        )
+        return ShowRecipeSerializer(recipe, context=context).data
 
 
 class ShoppingCartSerializer(serializers.ModelSerializer):
@@ -295,7 +366,7 @@ class RecipeForFollowersSerializer(serializers.ModelSerializer):
     """
     Сериализатор для отображения рецептов в подписке.
     """
-    image = Base64ImageField()
+    image = RenditionImageField('thumbnail')
 
     class Meta:
         model = Recipe
@@ -307,25 +378,15 @@ class RecipeForFollowersSerializer(serializers.ModelSerializer):
         )
 
 
-class SubscriptionSerializer(serializers.ModelSerializer):
+class SubscriptionSerializer(CustomUserSerializer):
     """
     Сериализатор для модели Подписок.
     """
-    recipes_count = SerializerMethodField()
     recipes = RecipeForFollowersSerializer(
         many=True,
         read_only=True
     )
 
-    def get_recipes_count(self, obj):
-        """
-        Функция для получения количества рецептов пользователя.
-        """
-        recipes = Recipe.objects.filter(
-            author=obj.id
-        )
-        return recipes.count()
-
     class Meta(CustomUserSerializer.Meta):
         fields = (
             CustomUserSerializer.Meta.fields
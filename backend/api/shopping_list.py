@@ -0,0 +1,158 @@
+import csv
+import os
+import tempfile
+from itertools import islice
+
+from django.conf import settings
+from django.db.models import Sum
+from django.http import FileResponse, StreamingHttpResponse
+from reportlab.lib.pagesizes import A4
+from reportlab.lib.units import mm
+from reportlab.pdfbase import pdfmetrics
+from reportlab.pdfbase.ttfonts import TTFont
+from reportlab.pdfgen import canvas
+
+from recipes.models import IngredientAmount
+
+# Сколько строк забирать из серверного курсора за один раз
+CURSOR_CHUNK_SIZE = 500
+# Сколько строк склеивать в один кусок потокового ответа
+STREAM_BUFFER_ROWS = 100
+
+PDF_FONT_NAME = 'ShoppingListFont'
+PDF_FONT_SIZE = 12
+PDF_MARGIN = 20 * mm
+PDF_LINE_HEIGHT = 7 * mm
+
+CSV_HEADER = ('Ингредиент', 'Единица измерения', 'Количество')
+
+
+def get_shopping_list(user):
+    """
+    Суммарное количество ингредиентов из корзины пользователя.
+    Возвращает кортежи (название, единица измерения, количество).
+    """
+    return (
+        IngredientAmount.objects
+        .filter(recipe__shoppingcart_recipe__user=user)
+        .values_list('ingredient__name', 'ingredient__measurement_unit')
+        .annotate(total_amount=Sum('amount'))
+        .order_by('ingredient__name', 'ingredient__measurement_unit')
+    )
+
+
+def iter_rows(queryset):
+    """
+    Читает строки через серверный курсор, не загружая весь список в память.
+    """
+    return queryset.iterator(chunk_size=CURSOR_CHUNK_SIZE)
+
+
+def buffered(lines, size=STREAM_BUFFER_ROWS):
+    """
+    Склеивает строки в куски, чтобы не писать в сокет по одной строке.
+    """
+    lines = iter(lines)
+    while True:
+        chunk = ''.join(islice(lines, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def format_line(index, name, measurement_unit, amount):
+    return f'{index}. {name} ({measurement_unit}) - {amount}'
+
+
+def iter_txt(rows):
+    for index, row in enumerate(rows, start=1):
+        yield format_line(index, *row) + '\n'
+
+
+class Echo:
+    """
+    Псевдобуфер для csv.writer: возвращает записанную строку.
+    """
+    def write(self, value):
+        return value
+
+
+def iter_csv(rows):
+    writer = csv.writer(Echo())
+    # BOM нужен, чтобы Excel корректно открыл кириллицу
+    yield '\ufeff' + writer.writerow(CSV_HEADER)
+    for row in rows:
+        yield writer.writerow(row)
+
+
+def get_pdf_font():
+    """
+    Регистрирует TTF-шрифт с кириллицей, если он доступен.
+    """
+    if PDF_FONT_NAME in pdfmetrics.getRegisteredFontNames():
+        return PDF_FONT_NAME
+    font_path = settings.SHOPPING_LIST_PDF_FONT
+    if font_path and os.path.exists(font_path):
+        pdfmetrics.registerFont(TTFont(PDF_FONT_NAME, font_path))
+        return PDF_FONT_NAME
+    return 'Helvetica'
+
+
+def write_pdf(rows, file):
+    """
+    Постранично пишет список покупок в PDF-файл.
+    """
+    font = get_pdf_font()
+    width, height = A4
+    pdf = canvas.Canvas(file, pagesize=A4)
+    pdf.setTitle('Список покупок')
+    y = height - PDF_MARGIN
+    pdf.setFont(font, PDF_FONT_SIZE)
+    for index, row in enumerate(rows, start=1):
+        if y < PDF_MARGIN:
+            pdf.showPage()
+            pdf.setFont(font, PDF_FONT_SIZE)
+            y = height - PDF_MARGIN
+        pdf.drawString(PDF_MARGIN, y, format_line(index, *row))
+        y -= PDF_LINE_HEIGHT
+    pdf.save()
+
+
+def txt_response(rows):
+    return StreamingHttpResponse(
+        buffered(iter_txt(rows)), content_type='text/plain; charset=utf-8'
+    )
+
+
+def csv_response(rows):
+    return StreamingHttpResponse(
+        buffered(iter_csv(rows)), content_type='text/csv; charset=utf-8'
+    )
+
+
+def pdf_response(rows):
+    # PDF содержит таблицу смещений объектов в конце файла, поэтому
+    # документ собирается во временном файле и отдаётся из него кусками.
+    file = tempfile.TemporaryFile()
+    write_pdf(rows, file)
+    file.seek(0)
+    return FileResponse(file, content_type='application/pdf')
+
+
+EXPORTERS = {
+    'txt': txt_response,
+    'csv': csv_response,
+    'pdf': pdf_response,
+}
+
+
+def export_shopping_list(user, file_format='txt'):
+    """
+    Потоковая выгрузка списка покупок в выбранном формате.
+    """
+    rows = iter_rows(get_shopping_list(user))
+    response = EXPORTERS[file_format](rows)
+    response['Content-Disposition'] = (
+        f'attachment; filename="shopping_list.{file_format}"'
+    )
+    return response
@@ -0,0 +1,14 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from rest_framework.authtoken.models import Token
+
+from recipes import versions
+from users.models import User
+
+
+@receiver(post_delete, sender=Token)
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def credentials_changed(instance, **kwargs):
+    user_id = instance.user_id if isinstance(instance, Token) else instance.pk
+    versions.bump_version(versions.user_auth(user_id))
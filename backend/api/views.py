@@ -1,3 +1,4 @@
+from django.db import transaction
 from django.shortcuts import get_object_or_404
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework import status, viewsets
@@ -6,17 +7,21 @@ from rest_framework.permissions import (AllowAny, IsAuthenticated,
                                         IsAuthenticatedOrReadOnly)
 from rest_framework.response import Response
 
-from api.filters import IngredientSearchFilter, RecipesFilter
-from api.pagination import CustomPagination
+from api.filters import IngredientAutocompleteFilter, RecipesFilter
+from api.mixins import AnonymousListCacheMixin, ConditionalGetMixin
+from api.pagination import CustomPagination, KeysetPagination
 from api.permissions import IsAuthenticatedAuthorOrReadOnly
+from api.renderers import CSVRenderer, PDFRenderer, TXTRenderer
 from api.serializers import (IngredientSerializer, ShoppingCartSerializer,
                              CreateRecipeSerializer, ShowRecipeSerializer,
                              TagSerializer, FavoriteSerializer)
-from recipes.models import (Favorite, Ingredient, IngredientAmount, Recipe,
-                            ShoppingCart, Tag)
+from api.shopping_list import export_shopping_list
+from recipes import versions
+from recipes.feed import get_feed_page
+from recipes.models import Favorite, Ingredient, Recipe, ShoppingCart, Tag
 
 
-class TagViewSet(viewsets.ReadOnlyModelViewSet):
+class TagViewSet(ConditionalGetMixin, viewsets.ReadOnlyModelViewSet):
     """
     Представление для просмотра тегов.
     """
@@ -24,21 +29,24 @@ class TagViewSet(viewsets.ReadOnlyModelViewSet):
     pagination_class = None
     serializer_class = TagSerializer
     permission_classes = (IsAuthenticatedOrReadOnly,)
+    conditional_versions = (versions.TAGS,)
 
 
-class IngredientViewSet(viewsets.ReadOnlyModelViewSet):
+class IngredientViewSet(ConditionalGetMixin, viewsets.ReadOnlyModelViewSet):
     """
     Представление для просмотра ингредиентов.
     """
     queryset = Ingredient.objects.all()
     permission_classes = (AllowAny,)
     serializer_class = IngredientSerializer
-    filter_backends = (IngredientSearchFilter,)
+    filter_backends = (IngredientAutocompleteFilter,)
     search_fields = ('^name',)
     pagination_class = None
+    conditional_versions = (versions.INGREDIENTS,)
 
 
-class RecipeViewSet(viewsets.ModelViewSet):
+class RecipeViewSet(ConditionalGetMixin, AnonymousListCacheMixin,
+                    viewsets.ModelViewSet):
     """
     Представление для создания рецептов и действия с ними.
     """
@@ -47,6 +55,35 @@ class RecipeViewSet(viewsets.ModelViewSet):
     filterset_class = RecipesFilter
     filter_backends = (DjangoFilterBackend,)
     pagination_class = CustomPagination
+    list_cache_version = versions.RECIPES
+    list_cache_params = (
+        'tags', 'author', 'search', 'ordering', 'popular_days',
+        'page', 'limit', 'cursor'
+    )
+    cursor_ordering = ('-pub_date', '-id')
+    conditional_versions = (versions.RECIPES,)
+    conditional_actions = ('retrieve',)
+    conditional_per_user = True
+    # Фильтры, результат которых зависит от данных пользователя
+    user_data_params = ('is_favorited', 'is_in_shopping_cart')
+
+    def get_count_versions(self, request):
+        """Штампы, от которых зависит количество рецептов в списке."""
+        names = [versions.RECIPES]
+        user = request.user
+        if user.is_authenticated and any(
+            param in request.query_params for param in self.user_data_params
+        ):
+            names.append(versions.user_data(user.id))
+        return [versions.get_version(name) for name in names]
+
+    def get_queryset(self):
+        queryset = Recipe.objects.all()
+        if self.action in ('list', 'retrieve'):
+            queryset = queryset.with_related().add_user_annotations(
+                self.request.user
+            )
+        return queryset
 
     def get_serializer_class(self):
         if self.request.method == 'POST' or self.request.method == 'PATCH':
@@ -64,6 +101,7 @@ class RecipeViewSet(viewsets.ModelViewSet):
         permission_classes=[IsAuthenticated],
         url_path='favorite'
     )
+    @transaction.atomic
     def favorite_recipe(self, request, pk=None):
         """
         Обработчик для добавления и удаления рецептов в избранное.
@@ -96,6 +134,7 @@ class RecipeViewSet(viewsets.ModelViewSet):
         permission_classes=[IsAuthenticated],
         url_path='shopping_cart'
     )
+    @transaction.atomic
     def shopping_cart(self, request, pk=None):
         """
         Обработчик для добавления и удаления рецептов в список покупок.
@@ -127,38 +166,31 @@ class RecipeViewSet(viewsets.ModelViewSet):
     @action(
         detail=False,
         permission_classes=[IsAuthenticated],
+        pagination_class=KeysetPagination,
+    )
+    def feed(self, request):
+        """
+        Лента рецептов авторов, на которых подписан пользователь.
+        """
+        page = get_feed_page(request.user, self.paginate_queryset)
+        serializer = ShowRecipeSerializer(
+            page, many=True, context=self.get_serializer_context()
+        )
+        return self.get_paginated_response(serializer.data)
+
+    @action(
+        detail=False,
+        permission_classes=[IsAuthenticated],
+        renderer_classes=(TXTRenderer, CSVRenderer, PDFRenderer),
         url_path='download_shopping_cart'
     )
     def generate_shopping_list(self, request):
         """
-        Генерирует список покупок на основе рецептов пользователя.
-        Формат TXT
+        Генерирует список покупок на основе рецептов из корзины пользователя.
+        Количество ингредиентов суммируется в БД одним запросом,
+        файл отдаётся потоково.
+        Формат выбирается параметром ?format=txt|csv|pdf, по умолчанию TXT.
         """
-        recipes = self.filter_queryset(self.get_queryset())
-        shopping_list = {}
-        for recipe in recipes:
-            ingredients = IngredientAmount.objects.filter(recipe=recipe)
-            for ingredient in ingredients:
-                name = ingredient.ingredient.name
-                measurement_unit = ingredient.ingredient.measurement_unit
-                amount = ingredient.amount
-                if name not in shopping_list:
-                    shopping_list[name] = {
-                        'measurement_unit': measurement_unit,
-                        'amount': amount
-                    }
-                else:
-                    shopping_list[name]['amount'] += amount
-
-        formatted_list = []
-        for index, (name, data) in enumerate(shopping_list.items(), start=1):
-            formatted_list.append(
-                f'{index}. {name} ({data["measurement_unit"]})'
-                f' - {data["amount"]}'
-            )
-        shopping_list_text = '\n'.join(formatted_list)
-        response = Response(shopping_list_text, content_type='text/plain')
-        response['Content-Disposition'] = (
-            'attachment; filename="shopping_list.txt"'
+        return export_shopping_list(
+            request.user, request.accepted_renderer.format
         )
-        return response
@@ -1,50 +1,227 @@
+import hashlib
 import logging
-import requests
 import os
+import queue
+import sys
+import threading
+import time
+from collections import OrderedDict
 
+import requests
 from django.core.cache import cache
 
 from dotenv import load_dotenv
 
 load_dotenv()
 
+# Ограничения Telegram: длина сообщения и не чаще ~20 сообщений
+# в минуту в один чат
+MAX_MESSAGE_LENGTH = 4096
+MIN_SEND_INTERVAL = 3.0
+
 
 class TelegramHandler(logging.Handler):
-    def __init__(self, token, chat_id):
+    """
+    Обработчик логов, отправляющий записи в Telegram из фонового потока.
+
+    emit() только кладёт запись в ограниченную очередь и никогда не ждёт
+    сети; при переполнении очереди запись отбрасывается. Фоновый поток
+    собирает записи за batch_interval секунд в одно сообщение-дайджест,
+    одинаковые записи (вместе с traceback) склеивает с числом повторов
+    и соблюдает ограничения Telegram на частоту отправки.
+    """
+
+    def __init__(self, token, chat_id, api_url='https://api.telegram.org',
+                 batch_interval=5.0, max_batch=50, queue_size=1000,
+                 min_send_interval=MIN_SEND_INTERVAL, timeout=5.0):
         super().__init__()
         self.token = token
         self.chat_id = chat_id
+        self.api_url = api_url.rstrip('/')
+        self.batch_interval = batch_interval
+        self.max_batch = max_batch
+        self.min_send_interval = min_send_interval
+        self.timeout = timeout
+        self.dropped = 0
+        # dropped меняют и emit(), и поток отправки
+        self._dropped_lock = threading.Lock()
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._thread = None
+        self._pid = None
+        self._start_lock = threading.Lock()
+        self._last_sent = 0.0
+
+    @property
+    def enabled(self):
+        return bool(self.token and self.chat_id)
 
     def emit(self, record):
-        log_entry = self.format(record)
-        url = f'https://api.telegram.org/bot{self.token}/sendMessage'
-        data = {'chat_id': self.chat_id, 'text': log_entry}
-        response = requests.post(url, data=data)
-        if response.status_code != 200:
-            print(
-                'Не удалось отправить сообщение в Telegram:',
-                response.text
+        if not self.enabled or threading.current_thread() is self._thread:
+            # Записи самого потока отправки (например, от requests)
+            # не отправляются, иначе возможен бесконечный цикл.
+            return
+        try:
+            message = self.format(record)
+        except Exception:
+            self.handleError(record)
+            return
+        self._ensure_thread()
+        try:
+            self._queue.put_nowait(message)
+        except queue.Full:
+            with self._dropped_lock:
+                self.dropped += 1
+
+    def _ensure_thread(self):
+        # Поток запускается при первой записи в каждом процессе:
+        # после fork воркера поток мастера в нём не существует.
+        if self._is_running():
+            return
+        with self._start_lock:
+            if not self._is_running():
+                self._pid = os.getpid()
+                self._thread = threading.Thread(
+                    target=self._run, name='telegram-log', daemon=True
+                )
+                self._thread.start()
+
+    def _is_running(self):
+        return (
+            self._thread is not None and self._thread.is_alive()
+            and self._pid == os.getpid()
+        )
+
+    def _collect(self):
+        """Записи за один интервал; None в конце - сигнал остановки."""
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + self.batch_interval
+        while batch[-1] is not None and len(batch) < self.max_batch:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def digest(self, messages):
+        """Одно сообщение из пачки записей с подсчётом повторов."""
+        counts = OrderedDict()
+        for message in messages:
+            key = hashlib.md5(message.encode('utf-8')).hexdigest()
+            text, count = counts.get(key, (message, 0))
+            counts[key] = (text, count + 1)
+        parts = [
+            text if count == 1 else f'[повторов: {count}]\n{text}'
+            for text, count in counts.values()
+        ]
+        with self._dropped_lock:
+            dropped, self.dropped = self.dropped, 0
+        if dropped:
+            parts.append(f'Отброшено записей при переполнении: {dropped}')
+        text = '\n\n'.join(parts)
+        if len(text) > MAX_MESSAGE_LENGTH:
+            text = text[:MAX_MESSAGE_LENGTH - 1] + '…'
+        return text
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            stop = batch[-1] is None
+            messages = [message for message in batch if message is not None]
+            if messages:
+                self._send_with_rate_limit(self.digest(messages))
+            if stop:
+                return
+
+    def _send_with_rate_limit(self, text):
+        wait = self._last_sent + self.min_send_interval - time.monotonic()
+        if wait > 0:
+            time.sleep(wait)
+        retry_after = self.send(text)
+        if retry_after:
+            # Telegram попросил подождать: сообщение повторяется один раз.
+            time.sleep(retry_after)
+            self.send(text)
+        self._last_sent = time.monotonic()
+
+    def send(self, text):
+        """
+        Отправка сообщения. Возвращает паузу в секундах, если Telegram
+        ответил 429, иначе None.
+        """
+        url = f'{self.api_url}/bot{self.token}/sendMessage'
+        try:
+            response = requests.post(
+                url, data={'chat_id': self.chat_id, 'text': text},
+                timeout=self.timeout
             )
+        except requests.RequestException as error:
+            print('Не удалось отправить сообщение в Telegram:', error,
+                  file=sys.stderr)
+            return None
+        if response.status_code == 429:
+            try:
+                return response.json()['parameters']['retry_after']
+            except (ValueError, KeyError, TypeError):
+                return self.min_send_interval
+        if response.status_code != 200:
+            print('Не удалось отправить сообщение в Telegram:',
+                  response.text, file=sys.stderr)
+        return None
+
+    def flush(self, timeout=None):
+        """
+        Дожидается отправки всех записей, но не дольше timeout секунд
+        (по умолчанию self.timeout), и останавливает поток; следующая
+        запись запустит его снова. Ожидание всегда ограничено, чтобы
+        недоступный Telegram не задерживал завершение процесса.
+        """
+        thread = self._thread
+        if thread is None or not thread.is_alive():
+            return
+        if timeout is None:
+            timeout = self.timeout
+        deadline = time.monotonic() + timeout
+        try:
+            self._queue.put(None, timeout=timeout)
+        except queue.Full:
+            return
+        thread.join(max(deadline - time.monotonic(), 0))
+
+    def close(self):
+        self.flush()
+        super().close()
 
     def send_initial_message(self):
-        if not cache.get('telegram_initial_message_sent'):
-            initial_message = (
-                'Привет, я ваш бот логов Foodgram\n'
-                'Наш сайт находится по адресу http://aragon.servebeer.com'
+        if not self.enabled or cache.get('telegram_initial_message_sent'):
+            return
+        initial_message = (
+            'Привет, я ваш бот логов Foodgram\n'
+            'Наш сайт находится по адресу http://aragon.servebeer.com'
+        )
+        url = f'{self.api_url}/bot{self.token}/sendMessage'
+        data = {'chat_id': self.chat_id, 'text': initial_message}
+        try:
+            response = requests.post(url, data=data, timeout=self.timeout)
+        except requests.RequestException as error:
+            print('Не удалось отправить начальное сообщение в Telegram:',
+                  error, file=sys.stderr)
+            return
+        if response.status_code == 200:
+            cache.set('telegram_initial_message_sent', True, None)
+        else:
+            print(
+                'Не удалось отправить начальное сообщение в Telegram:',
+                response.text, file=sys.stderr
             )
-            url = f'https://api.telegram.org/bot{self.token}/sendMessage'
-            data = {'chat_id': self.chat_id, 'text': initial_message}
-            response = requests.post(url, data=data)
-            if response.status_code == 200:
-                cache.set('telegram_initial_message_sent', True, None)
-            else:
-                print(
-                    'Не удалось отправить начальное сообщение в Telegram:',
-                    response.text
-                )
 
 
 TELEGRAM_TOKEN = os.getenv('TELEGRAM_TOKEN')
 TELEGRAM_CHAT_ID = os.getenv('TELEGRAM_CHAT_ID')
+TELEGRAM_API_URL = os.getenv('TELEGRAM_API_URL', 'https://api.telegram.org')
 
-telegram_handler = TelegramHandler(TELEGRAM_TOKEN, TELEGRAM_CHAT_ID)
+telegram_handler = TelegramHandler(
+    TELEGRAM_TOKEN, TELEGRAM_CHAT_ID, api_url=TELEGRAM_API_URL
+)
@@ -28,8 +28,11 @@ root_logger.setLevel(logging.ERROR)
 # Добавьте кастомный обработчик к корневому логгеру
 root_logger.addHandler(telegram_handler)
 
-# Отправьте приветственное сообщение
-telegram_handler.send_initial_message()
+# Приветственное сообщение бота отправляется в фоне при запуске
+# приложения (api.apps.ApiConfig.ready), только если это включено
+TELEGRAM_STARTUP_MESSAGE = (
+    os.getenv('TELEGRAM_STARTUP_MESSAGE', '').lower() == 'true'
+)
 
 INSTALLED_APPS = [
     'django.contrib.admin',
@@ -38,6 +41,7 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
     'rest_framework',
     'rest_framework.authtoken',
     'djoser',
@@ -99,6 +103,41 @@ DATABASES = {
             default='5432'),
     }}
 
+# По умолчанию кеш в памяти процесса. Для общего кеша между воркерами
+# можно указать, например, CACHE_BACKEND=django_redis.cache.RedisCache
+# и CACHE_LOCATION=redis://redis:6379/1 (нужен пакет django-redis).
+CACHES = {
+    'default': {
+        'BACKEND': os.getenv(
+            'CACHE_BACKEND',
+            default='django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': os.getenv('CACHE_LOCATION', default=''),
+    }
+}
+
+# Срок жизни штампов версий данных, сек., если кеш в памяти процесса.
+# Изменения из других процессов станут видны не позже чем через это время.
+VERSION_STAMP_TIMEOUT = int(os.getenv('VERSION_STAMP_TIMEOUT', 30))
+
+# Время жизни закешированных списков для анонимных пользователей, сек.
+LIST_CACHE_TIMEOUT = int(os.getenv('LIST_CACHE_TIMEOUT', 300))
+
+# Время жизни закешированного количества объектов в пагинации, сек.
+PAGINATION_COUNT_CACHE_TIMEOUT = int(
+    os.getenv('PAGINATION_COUNT_CACHE_TIMEOUT', 30)
+)
+# С какого размера таблицы без фильтров использовать оценку reltuples
+PAGINATION_ESTIMATE_THRESHOLD = int(
+    os.getenv('PAGINATION_ESTIMATE_THRESHOLD', 100_000)
+)
+
+# Заполнение ленты подписок при публикации рецепта (fan-out on write).
+# Лента из таблицы читается у пользователей, подписанных не меньше чем
+# на FEED_INBOX_MIN_FOLLOWING авторов. После включения ленты нужно
+# заполнить командой rebuild_feed.
+FEED_INBOX_ENABLED = os.getenv('FEED_INBOX_ENABLED', '').lower() == 'true'
+FEED_INBOX_MIN_FOLLOWING = int(os.getenv('FEED_INBOX_MIN_FOLLOWING', 50))
+
 AUTH_PASSWORD_VALIDATORS = [
     {
         'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator',
@@ -119,7 +158,7 @@ REST_FRAMEWORK = {
         'rest_framework.permissions.AllowAny',
     ],
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework.authentication.TokenAuthentication',
+        'api.authentication.CachingTokenAuthentication',
     ],
     'DEFAULT_FILTER_BACKENDS': [
         'django_filters.rest_framework.DjangoFilterBackend'
@@ -128,6 +167,13 @@ REST_FRAMEWORK = {
     'PAGE_SIZE': 6,
 }
 
+# Кеш аутентификации по токену в памяти процесса: срок жизни записи
+# в секундах и максимальное число токенов. Работает только с общим
+# кешем (CACHE_BACKEND), через который воркеры узнают о выходе; с кешем
+# по умолчанию (LocMemCache) отключён.
+TOKEN_AUTH_CACHE_TIMEOUT = int(os.getenv('TOKEN_AUTH_CACHE_TIMEOUT', 300))
+TOKEN_AUTH_CACHE_SIZE = int(os.getenv('TOKEN_AUTH_CACHE_SIZE', 10_000))
+
 
 DJOSER = {
     'SERIALIZERS': {
@@ -162,6 +208,11 @@ STATIC_ROOT = os.path.join(BASE_DIR, 'static/')
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
+# Файлы именуются по sha256 содержимого: одинаковые не дублируются
+DEFAULT_FILE_STORAGE = os.getenv(
+    'DEFAULT_FILE_STORAGE', 'recipes.storage.ContentAddressedStorage'
+)
+
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 MAX_LENGTH_TEXT = 200
@@ -172,3 +223,26 @@ MAX_LENGTH_USER_NAMES = 150
 
 VALUE_RECIPE_MIN = 1
 VALUE_RECIPE_MAX = 32_000
+
+# Максимум ингредиентов в ответе автодополнения (None - без ограничения)
+INGREDIENT_SEARCH_LIMIT = None
+
+# Картинки рецептов: максимальный размер загрузки в байтах, порог,
+# после которого декодированный файл пишется на диск, и обработка
+# вариантов в WebP ('thread' - фоновый пул потоков, 'sync' - сразу)
+IMAGE_MAX_UPLOAD_SIZE = int(os.getenv('IMAGE_MAX_UPLOAD_SIZE', 10 * 2**20))
+IMAGE_SPOOL_MAX_SIZE = int(os.getenv('IMAGE_SPOOL_MAX_SIZE', 2**20))
+IMAGE_RENDITION_EXECUTOR = os.getenv('IMAGE_RENDITION_EXECUTOR', 'thread')
+IMAGE_RENDITION_WORKERS = int(os.getenv('IMAGE_RENDITION_WORKERS', 2))
+IMAGE_WEBP_QUALITY = int(os.getenv('IMAGE_WEBP_QUALITY', 80))
+
+# Файлы картинок моложе указанного числа минут не удаляются: одинаковую
+# картинку может сохранять ещё не завершённый запрос. Их подберёт
+# команда collect_media.
+MEDIA_DELETE_GRACE = int(os.getenv('MEDIA_DELETE_GRACE', 60))
+
+# Шрифт с кириллицей для выгрузки списка покупок в PDF
+SHOPPING_LIST_PDF_FONT = os.getenv(
+    'SHOPPING_LIST_PDF_FONT',
+    '/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf'
+)
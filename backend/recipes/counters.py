@@ -0,0 +1,62 @@
+from django.apps import apps as global_apps
+from django.db.models import Count, F, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce, Greatest
+
+# Денормализованные счётчики: (модель, поле счётчика,
+# модель подсчитываемых строк, поле связи с моделью счётчика)
+COUNTERS = (
+    ('recipes.Recipe', 'favorites_count', 'recipes.Favorite', 'recipe'),
+    ('recipes.Recipe', 'shopping_cart_count', 'recipes.ShoppingCart',
+     'recipe'),
+    ('users.User', 'recipes_count', 'recipes.Recipe', 'author'),
+    ('users.User', 'followers_count', 'users.Follow', 'author'),
+)
+
+
+def update_counter(model, pk, field, delta):
+    """
+    Атомарно меняет счётчик одной строки на delta в БД.
+    """
+    model.objects.filter(pk=pk).update(
+        **{field: Greatest(F(field) + delta, 0)}
+    )
+
+
+def actual_count(apps, source, link):
+    """
+    Подзапрос с фактическим количеством строк для каждого объекта.
+    """
+    model = apps.get_model(source)
+    counts = (
+        model.objects.filter(**{link: OuterRef('pk')})
+        .order_by()
+        .values(link)
+        .annotate(total=Count('pk'))
+        .values('total')
+    )
+    return Coalesce(Subquery(counts, output_field=IntegerField()), 0)
+
+
+def rebuild_counters(apps=global_apps):
+    """
+    Пересчитывает все счётчики одним UPDATE на каждый счётчик.
+    """
+    for target, field, source, link in COUNTERS:
+        apps.get_model(target).objects.update(
+            **{field: actual_count(apps, source, link)}
+        )
+
+
+def find_mismatches(apps=global_apps):
+    """
+    Количество объектов с расхождением для каждого счётчика.
+    """
+    mismatches = {}
+    for target, field, source, link in COUNTERS:
+        mismatches[f'{target}.{field}'] = (
+            apps.get_model(target).objects
+            .annotate(actual=actual_count(apps, source, link))
+            .exclude(**{field: F('actual')})
+            .count()
+        )
+    return mismatches
@@ -0,0 +1,82 @@
+from django.apps import apps as global_apps
+from django.db.models import Count, Min
+
+from recipes.models import MAX_INGREDIENT_AMOUNT
+
+
+def find_duplicates(apps=global_apps):
+    """
+    Соответствие id дубликата -> id оставляемого ингредиента.
+    Оставляется ингредиент с наименьшим id среди одинаковых
+    (название, единица измерения).
+    """
+    Ingredient = apps.get_model('recipes', 'Ingredient')
+    groups = (
+        Ingredient.objects.order_by()
+        .values('name', 'measurement_unit')
+        .annotate(keep=Min('pk'), total=Count('pk'))
+        .filter(total__gt=1)
+    )
+    keep = {
+        (group['name'], group['measurement_unit']): group['keep']
+        for group in groups
+    }
+    if not keep:
+        return {}
+    rows = Ingredient.objects.filter(
+        name__in={name for name, _ in keep}
+    ).values_list('pk', 'name', 'measurement_unit')
+    return {
+        pk: keep[(name, unit)]
+        for pk, name, unit in rows
+        if (name, unit) in keep and pk != keep[(name, unit)]
+    }
+
+
+def merge_duplicate_ingredients(apps=global_apps):
+    """
+    Удаляет дубликаты ингредиентов, перенося их строки IngredientAmount
+    на оставляемый ингредиент. Если в рецепте уже есть оставляемый
+    ингредиент, количества складываются в одну строку.
+    Возвращает (удалено ингредиентов, объединено строк рецептов).
+    """
+    Ingredient = apps.get_model('recipes', 'Ingredient')
+    IngredientAmount = apps.get_model('recipes', 'IngredientAmount')
+    mapping = find_duplicates(apps)
+    if not mapping:
+        return 0, 0
+
+    amounts = IngredientAmount.objects.filter(
+        ingredient_id__in=set(mapping) | set(mapping.values())
+    ).order_by('pk')
+    survivors = {}
+    changed = {}
+    merged = []
+    for amount in amounts:
+        target = mapping.get(amount.ingredient_id, amount.ingredient_id)
+        key = (amount.recipe_id, target)
+        survivor = survivors.get(key)
+        if survivor is None:
+            survivors[key] = amount
+            if amount.ingredient_id != target:
+                amount.ingredient_id = target
+                changed[amount.pk] = amount
+            continue
+        if amount.ingredient_id == target:
+            # Строка с оставляемым ингредиентом становится основной.
+            survivors[key], survivor, amount = amount, amount, survivor
+            changed.pop(amount.pk, None)
+        survivor.amount = min(
+            survivor.amount + amount.amount, MAX_INGREDIENT_AMOUNT
+        )
+        changed[survivor.pk] = survivor
+        merged.append(amount.pk)
+
+    # Сначала удаляются поглощённые строки, иначе перенос нарушит
+    # уникальность (ingredient, recipe).
+    IngredientAmount.objects.filter(pk__in=merged).delete()
+    IngredientAmount.objects.bulk_update(
+        changed.values(), ('ingredient', 'amount'), batch_size=1000
+    )
+    Ingredient.objects.filter(pk__in=mapping).delete()
+    return len(mapping), len(merged)
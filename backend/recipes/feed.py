@@ -0,0 +1,106 @@
+from django.conf import settings
+
+from recipes.models import FeedItem, Recipe
+from users.models import Follow
+
+BATCH_SIZE = 1000
+
+
+def use_inbox(user):
+    """
+    Лента из таблицы FeedItem читается для пользователей с большим
+    числом подписок, если заполнение ленты при записи включено.
+    """
+    return (
+        settings.FEED_INBOX_ENABLED
+        and Follow.objects.filter(user=user).count()
+        >= settings.FEED_INBOX_MIN_FOLLOWING
+    )
+
+
+def get_join_feed(user, recipes=None):
+    """
+    Рецепты авторов, на которых подписан пользователь, через JOIN с Follow.
+    recipes - исходный запрос рецептов, по умолчанию все рецепты.
+    """
+    if recipes is None:
+        recipes = Recipe.objects.all()
+    return recipes.filter(author__following__user=user)
+
+
+def get_inbox_feed(user):
+    """
+    Записи заранее заполненной ленты пользователя в порядке индекса
+    feed_item_user_date_idx.
+    """
+    return FeedItem.objects.filter(user=user).order_by(
+        '-pub_date', '-recipe_id'
+    )
+
+
+def get_feed_page(user, paginate):
+    """
+    Страница ленты подписок с аннотациями пользователя.
+
+    paginate - функция пагинации представления. Лента из таблицы
+    пагинируется по записям FeedItem, а рецепты страницы загружаются
+    одним запросом по id в порядке записей.
+    """
+    recipes = Recipe.objects.with_related().add_user_annotations(user)
+    if not use_inbox(user):
+        return paginate(get_join_feed(user, recipes))
+    items = paginate(get_inbox_feed(user))
+    by_id = recipes.in_bulk([item.recipe_id for item in items])
+    return [by_id[item.recipe_id] for item in items if item.recipe_id in by_id]
+
+
+def fan_out_recipe(recipe):
+    """
+    Добавляет новый рецепт в ленты всех подписчиков автора.
+    """
+    followers = Follow.objects.filter(
+        author_id=recipe.author_id
+    ).values_list('user_id', flat=True)
+    FeedItem.objects.bulk_create(
+        (
+            FeedItem(user_id=user_id, recipe=recipe, pub_date=recipe.pub_date)
+            for user_id in followers.iterator()
+        ),
+        batch_size=BATCH_SIZE,
+        ignore_conflicts=True,
+    )
+
+
+def add_author_to_feed(follow):
+    """
+    Добавляет рецепты автора в ленту нового подписчика.
+    """
+    recipes = Recipe.objects.filter(
+        author_id=follow.author_id
+    ).values_list('id', 'pub_date')
+    FeedItem.objects.bulk_create(
+        (
+            FeedItem(user_id=follow.user_id, recipe_id=pk, pub_date=pub_date)
+            for pk, pub_date in recipes.iterator()
+        ),
+        batch_size=BATCH_SIZE,
+        ignore_conflicts=True,
+    )
+
+
+def remove_author_from_feed(follow):
+    """
+    Убирает рецепты автора из ленты бывшего подписчика.
+    """
+    FeedItem.objects.filter(
+        user_id=follow.user_id, recipe__author_id=follow.author_id
+    ).delete()
+
+
+def rebuild_inbox():
+    """
+    Полностью перестраивает ленты всех пользователей.
+    """
+    FeedItem.objects.all().delete()
+    for follow in Follow.objects.iterator():
+        add_author_to_feed(follow)
@@ -0,0 +1,174 @@
+import io
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.db import connections, transaction
+from django.db.models import Q
+from django.utils import timezone
+from PIL import Image, ImageOps
+
+from recipes import versions
+
+logger = logging.getLogger(__name__)
+
+# Варианты картинки рецепта: название и размер стороны квадрата,
+# в который вписывается изображение.
+RENDITIONS = (
+    ('thumbnail', 160),
+    ('card', 480),
+    ('full', 1280),
+)
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_executor():
+    """
+    Пул потоков для обработки картинок, создаётся при первом вызове.
+    """
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=settings.IMAGE_RENDITION_WORKERS,
+                thread_name_prefix='image-renditions',
+            )
+    return _executor
+
+
+def rendition_path(name, key):
+    return f'{os.path.splitext(name)[0]}_{key}.webp'
+
+
+def render(image, size):
+    copy = image.copy()
+    copy.thumbnail((size, size), Image.LANCZOS)
+    buffer = io.BytesIO()
+    copy.save(buffer, 'WEBP', quality=settings.IMAGE_WEBP_QUALITY)
+    return ContentFile(buffer.getvalue())
+
+
+def make_renditions(recipe_id, name):
+    """
+    Создаёт WebP-варианты картинки и сохраняет их пути в рецепте,
+    если картинка рецепта за это время не поменялась.
+    """
+    from recipes.models import Recipe
+
+    storage = Recipe._meta.get_field('image').storage
+    try:
+        with storage.open(name) as image_file:
+            image = ImageOps.exif_transpose(Image.open(image_file))
+            image = image.convert(
+                'RGBA' if 'A' in image.getbands() else 'RGB'
+            )
+        renditions = {'source': name}
+        for key, size in RENDITIONS:
+            renditions[key] = storage.save(
+                rendition_path(name, key), render(image, size)
+            )
+        updated = Recipe.objects.filter(pk=recipe_id, image=name).update(
+            image_renditions=renditions
+        )
+        if updated:
+            # update() не отправляет сигналы моделей.
+            versions.bump_version(versions.RECIPES)
+    except Exception:
+        logger.exception('Не удалось обработать картинку %s', name)
+    finally:
+        if settings.IMAGE_RENDITION_EXECUTOR != 'sync':
+            connections.close_all()
+
+
+def schedule_renditions(recipe):
+    """
+    Ставит обработку картинки рецепта в очередь после коммита транзакции.
+    """
+    if not recipe.image:
+        return
+    args = (recipe.pk, recipe.image.name)
+    if settings.IMAGE_RENDITION_EXECUTOR == 'sync':
+        transaction.on_commit(lambda: make_renditions(*args))
+    else:
+        transaction.on_commit(
+            lambda: get_executor().submit(make_renditions, *args)
+        )
+
+
+def rendition_urls(recipe):
+    """
+    Адреса готовых вариантов картинки; пусто, пока обработка не закончена.
+    """
+    renditions = recipe.image_renditions or {}
+    if not recipe.image or renditions.get('source') != recipe.image.name:
+        return {}
+    storage = recipe.image.storage
+    return {
+        key: storage.url(renditions[key])
+        for key, _ in RENDITIONS
+        if key in renditions
+    }
+
+
+def image_files(image, renditions):
+    """Имена файла картинки и всех её вариантов."""
+    names = {image} if image else set()
+    names.update(
+        value for key, value in (renditions or {}).items()
+        if key != 'source'
+    )
+    return names
+
+
+def referenced_files(names):
+    """Какие из файлов ещё используются рецептами (один запрос)."""
+    names = list(names)
+    from recipes.models import Recipe
+
+    condition = Q(image__in=names)
+    for key, _ in RENDITIONS:
+        condition |= Q(**{f'image_renditions__{key}__in': names})
+    referenced = set()
+    for image, renditions in Recipe.objects.filter(condition).values_list(
+        'image', 'image_renditions'
+    ):
+        referenced |= image_files(image, renditions)
+    return referenced
+
+
+def is_recent(storage, name):
+    """
+    Изменён ли файл за последние MEDIA_DELETE_GRACE минут. Такой файл
+    может сохранять другой запрос, ещё не закоммитивший ссылку на него.
+    """
+    deadline = timezone.now() - timedelta(minutes=settings.MEDIA_DELETE_GRACE)
+    try:
+        return storage.get_modified_time(name) >= deadline
+    except FileNotFoundError:
+        return False
+
+
+def delete_unreferenced(names):
+    from recipes.models import Recipe
+
+    storage = Recipe._meta.get_field('image').storage
+    for name in set(names) - referenced_files(names):
+        if not is_recent(storage, name):
+            storage.delete(name)
+
+
+def release_image(image, renditions):
+    """
+    Удаляет файлы картинки после коммита, если на них больше
+    не ссылается ни один рецепт. Недавно сохранённые файлы остаются
+    до запуска collect_media.
+    """
+    names = image_files(image, renditions)
+    if names:
+        transaction.on_commit(lambda: delete_unreferenced(names))
@@ -0,0 +1,68 @@
+import threading
+from bisect import bisect_left
+
+from recipes import versions
+from recipes.models import Ingredient
+
+# Символ больше любого другого: верхняя граница диапазона по префиксу
+MAX_CHAR = '\U0010ffff'
+
+
+class IngredientIndex:
+    """
+    Индекс ингредиентов в памяти процесса для автодополнения.
+
+    Названия в нижнем регистре хранятся в отсортированном массиве,
+    поиск по префиксу делается двоичным поиском. Найденные ингредиенты
+    возвращаются в том же порядке, что и из БД. Индекс перестраивается,
+    когда меняется штамп версии ингредиентов; с кешем в памяти процесса
+    штамп истекает через VERSION_STAMP_TIMEOUT секунд.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._version = None
+        # Ключи и записи заменяются одним кортежем, чтобы читатель
+        # не получил ключи нового индекса вместе с записями старого.
+        self._data = ([], [])
+
+    def _build(self):
+        ingredients = Ingredient.objects.all()
+        entries = sorted(
+            (ingredient.name.lower(), rank, ingredient)
+            for rank, ingredient in enumerate(ingredients)
+        )
+        self._data = (
+            [key for key, _, _ in entries],
+            [(rank, ingredient) for _, rank, ingredient in entries],
+        )
+
+    def _refresh(self):
+        version = versions.get_version(versions.INGREDIENTS)
+        if version == self._version:
+            return
+        with self._lock:
+            if version != self._version:
+                self._build()
+                self._version = version
+
+    def search(self, terms, limit=None):
+        """
+        Ингредиенты, название которых начинается с каждого из терминов
+        без учёта регистра.
+        """
+        self._refresh()
+        keys, entries = self._data
+        terms = [term.lower() for term in terms]
+        if not terms:
+            return [ingredient for _, ingredient in entries]
+        prefix = max(terms, key=len)
+        if not all(prefix.startswith(term) for term in terms):
+            return []
+        start = bisect_left(keys, prefix)
+        end = bisect_left(keys, prefix + MAX_CHAR, start)
+        matches = sorted(entries[start:end], key=lambda entry: entry[0])
+        return [ingredient for _, ingredient in matches[:limit]]
+
+
+ingredient_index = IngredientIndex()
@@ -0,0 +1,65 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db.models import Count
+
+from recipes.feed import get_inbox_feed, get_join_feed
+from users.models import User
+
+
+class Command(BaseCommand):
+    help = (
+        'Сравнение времени первой страницы ленты подписок: '
+        'JOIN с Follow и заранее заполненная лента'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--users', type=int, default=10,
+            help='Сколько пользователей с наибольшим числом подписок взять.'
+        )
+        parser.add_argument(
+            '--repeat', type=int, default=20,
+            help='Сколько раз выполнить запрос для каждого пользователя.'
+        )
+        parser.add_argument(
+            '--limit', type=int, default=6,
+            help='Размер страницы ленты.'
+        )
+
+    def measure(self, queryset, repeat, limit):
+        start = time.perf_counter()
+        for _ in range(repeat):
+            list(queryset[:limit])
+        return (time.perf_counter() - start) / repeat * 1000
+
+    def handle(self, *args, **options):
+        users = (
+            User.objects.annotate(following_count=Count('subscriber'))
+            .filter(following_count__gt=0)
+            .order_by('-following_count')[:options['users']]
+        )
+        if not users:
+            self.stdout.write('Нет пользователей с подписками')
+            return
+        total_join = total_inbox = 0
+        for user in users:
+            join_ms = self.measure(
+                get_join_feed(user).order_by('-pub_date', '-id')
+                .values_list('id', flat=True),
+                options['repeat'], options['limit']
+            )
+            inbox_ms = self.measure(
+                get_inbox_feed(user).values_list('recipe_id', flat=True),
+                options['repeat'], options['limit']
+            )
+            total_join += join_ms
+            total_inbox += inbox_ms
+            self.stdout.write(
+                f'{user.username} (подписок {user.following_count}): '
+                f'JOIN {join_ms:.2f} мс, лента {inbox_ms:.2f} мс'
+            )
+        self.stdout.write(self.style.SUCCESS(
+            f'В среднем: JOIN {total_join / len(users):.2f} мс, '
+            f'лента {total_inbox / len(users):.2f} мс'
+        ))
@@ -0,0 +1,45 @@
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+# Загрузка WSGI-приложения - то же, что делает воркер gunicorn при старте
+WORKER_BOOT = 'from foodgram.wsgi import application'
+
+
+class Command(BaseCommand):
+    help = (
+        'Время запуска: manage.py check и загрузка WSGI-приложения '
+        'воркером, каждое в отдельном процессе'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--repeat', type=int, default=5)
+
+    def measure(self, command, repeat):
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            subprocess.run(
+                command, cwd=settings.BASE_DIR, env=os.environ.copy(),
+                stdout=subprocess.DEVNULL, check=True
+            )
+            timings.append((time.perf_counter() - start) * 1000)
+        return timings
+
+    def handle(self, *args, **options):
+        commands = (
+            ('manage.py check', [sys.executable, 'manage.py', 'check']),
+            ('загрузка воркера', [sys.executable, '-c', WORKER_BOOT]),
+        )
+        for title, command in commands:
+            timings = self.measure(command, options['repeat'])
+            self.stdout.write(
+                f'{title}: медиана {statistics.median(timings):.0f} мс, '
+                f'минимум {min(timings):.0f} мс'
+            )
+        self.stdout.write(self.style.SUCCESS('Замер завершён'))
@@ -0,0 +1,88 @@
+import random
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from recipes.models import Recipe, Tag
+from users.models import User
+
+BATCH_SIZE = 5000
+
+
+class Command(BaseCommand):
+    help = (
+        'Сравнение фильтра по тегам через JOIN и через EXISTS '
+        'на синтетических данных. Данные откатываются после замера.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--recipes', type=int, default=100_000)
+        parser.add_argument('--tags', type=int, default=3)
+        parser.add_argument('--repeat', type=int, default=5)
+        parser.add_argument('--limit', type=int, default=6)
+
+    def fill(self, recipes_total, tags_total):
+        author = User.objects.create(
+            username='benchmark_tag_filter',
+            email='benchmark_tag_filter@example.com',
+        )
+        Tag.objects.bulk_create(
+            Tag(
+                name=f'benchmark-{number}',
+                slug=f'benchmark-{number}',
+                color=f'#{number:06X}',
+            ) for number in range(tags_total)
+        )
+        tag_ids = [
+            tag.id for tag in Tag.objects.filter(slug__startswith='benchmark-')
+        ]
+        through = Recipe.tags.through
+        for start in range(0, recipes_total, BATCH_SIZE):
+            recipes = Recipe.objects.bulk_create(
+                Recipe(
+                    author=author, name=f'Рецепт {number}', text='-',
+                    cooking_time=random.randint(1, 120),
+                ) for number in range(
+                    start, min(start + BATCH_SIZE, recipes_total)
+                )
+            )
+            if recipes[0].pk is None:
+                # Без RETURNING (SQLite) id берутся повторным запросом.
+                recipes = Recipe.objects.filter(author=author).order_by(
+                    '-id'
+                )[:len(recipes)]
+            through.objects.bulk_create(
+                through(recipe_id=recipe.pk, tag_id=tag_id)
+                for recipe in recipes
+                for tag_id in random.sample(
+                    tag_ids, random.randint(1, len(tag_ids))
+                )
+            )
+        return tag_ids
+
+    def measure(self, queryset, repeat, limit):
+        start = time.perf_counter()
+        for _ in range(repeat):
+            count = queryset.count()
+            list(queryset.order_by('-pub_date', '-id').values_list(
+                'id', flat=True
+            )[:limit])
+        return count, (time.perf_counter() - start) / repeat * 1000
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            self.stdout.write('Заполнение данных...')
+            tag_ids = self.fill(options['recipes'], options['tags'])
+            join = Recipe.objects.filter(tags__id__in=tag_ids)
+            exists = Recipe.objects.with_any_tag(tag_ids)
+            for title, queryset in (('JOIN', join), ('EXISTS', exists)):
+                count, elapsed = self.measure(
+                    queryset, options['repeat'], options['limit']
+                )
+                self.stdout.write(
+                    f'{title}: строк {count}, '
+                    f'count + первая страница {elapsed:.1f} мс'
+                )
+            transaction.set_rollback(True)
+        self.stdout.write(self.style.SUCCESS('Данные замера удалены'))
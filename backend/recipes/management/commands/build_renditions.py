@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand
+
+from recipes.images import make_renditions
+from recipes.models import Recipe
+
+
+class Command(BaseCommand):
+    help = 'Создание WebP-вариантов картинок рецептов'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--all', action='store_true',
+            help='Пересоздать варианты и для уже обработанных картинок.'
+        )
+
+    def handle(self, *args, **options):
+        recipes = (
+            Recipe.objects.exclude(image='').exclude(image__isnull=True)
+            .only('id', 'image', 'image_renditions')
+        )
+        processed = 0
+        for recipe in recipes.iterator():
+            source = (recipe.image_renditions or {}).get('source')
+            if options['all'] or source != recipe.image.name:
+                make_renditions(recipe.pk, recipe.image.name)
+                processed += 1
+        self.stdout.write(self.style.SUCCESS(
+            f'Обработано картинок: {processed}'
+        ))
@@ -0,0 +1,61 @@
+import os
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from recipes.images import image_files
+from recipes.models import Recipe
+
+
+class Command(BaseCommand):
+    help = 'Удаление файлов картинок, на которые не ссылается ни один рецепт'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--grace', type=int, default=settings.MEDIA_DELETE_GRACE,
+            help=(
+                'Не трогать файлы моложе указанного числа минут: '
+                'они могут принадлежать ещё не завершённым запросам.'
+            )
+        )
+        parser.add_argument(
+            '--dry-run', action='store_true',
+            help='Только показать найденные файлы.'
+        )
+
+    def walk(self, storage, path):
+        directories, files = storage.listdir(path)
+        for name in files:
+            yield os.path.join(path, name)
+        for directory in directories:
+            yield from self.walk(storage, os.path.join(path, directory))
+
+    def handle(self, *args, **options):
+        field = Recipe._meta.get_field('image')
+        storage = field.storage
+        if not storage.exists(field.upload_to):
+            self.stdout.write('Файлов картинок нет')
+            return
+        referenced = set()
+        for image, renditions in Recipe.objects.values_list(
+            'image', 'image_renditions'
+        ).iterator():
+            referenced |= image_files(image, renditions)
+
+        deadline = timezone.now() - timedelta(minutes=options['grace'])
+        orphans = [
+            name for name in self.walk(storage, field.upload_to.rstrip('/'))
+            if name not in referenced
+            and storage.get_modified_time(name) < deadline
+        ]
+        for name in orphans:
+            if options['dry_run']:
+                self.stdout.write(name)
+            else:
+                storage.delete(name)
+        action = 'Найдено' if options['dry_run'] else 'Удалено'
+        self.stdout.write(self.style.SUCCESS(
+            f'{action} неиспользуемых файлов: {len(orphans)}'
+        ))
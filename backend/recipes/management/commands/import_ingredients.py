@@ -1,21 +1,124 @@
+import csv
+import io
 import json
+import time
+from pathlib import Path
+
 from django.conf import settings
-from django.core.management import BaseCommand
+from django.core.management import BaseCommand, CommandError
+from django.db import connection, transaction
+
+from recipes import versions
 from recipes.models import Ingredient
 
+BATCH_SIZE = 1000
+
 
 class Command(BaseCommand):
+    help = 'Загрузка ингредиентов из CSV или JSON'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--path',
+            default=str(settings.BASE_DIR / 'data' / 'ingredients.json'),
+            help='Путь к файлу ingredients.json или ingredients.csv.'
+        )
+
+    def read_rows(self, path):
+        """
+        Построчное чтение файла: CSV без заголовка (название, единица)
+        или JSON-список объектов с полями name и measurement_unit.
+        """
+        suffix = Path(path).suffix.lower()
+        with open(path, 'r', encoding='utf8') as inp_f:
+            if suffix == '.csv':
+                for row in csv.reader(inp_f):
+                    if len(row) >= 2:
+                        yield row[0], row[1]
+            elif suffix == '.json':
+                for row in json.load(inp_f):
+                    yield row['name'], row['measurement_unit']
+            else:
+                raise CommandError(f'Неподдерживаемый формат файла: {path}')
+
+    def copy_ingredients(self, ingredients):
+        """
+        Вставка новых ингредиентов через COPY (только PostgreSQL).
+
+        COPY не умеет пропускать конфликты, поэтому строки копируются во
+        временную таблицу и переносятся INSERT ... ON CONFLICT DO NOTHING:
+        ингредиенты, добавленные параллельно, не ломают загрузку.
+        Возвращает число вставленных строк.
+        """
+        buffer = io.StringIO()
+        csv.writer(buffer).writerows(
+            (ingredient.name, ingredient.measurement_unit)
+            for ingredient in ingredients
+        )
+        buffer.seek(0)
+        quote = connection.ops.quote_name
+        table = quote(Ingredient._meta.db_table)
+        columns = f'{quote("name")}, {quote("measurement_unit")}'
+        with connection.cursor() as cursor:
+            cursor.execute(
+                'CREATE TEMP TABLE "import_ingredients" '
+                f'ON COMMIT DROP AS SELECT {columns} FROM {table} WITH NO DATA'
+            )
+            cursor.copy_expert(
+                f'COPY "import_ingredients" ({columns}) '
+                'FROM STDIN WITH (FORMAT csv)',
+                buffer
+            )
+            cursor.execute(
+                f'INSERT INTO {table} ({columns}) '
+                f'SELECT {columns} FROM "import_ingredients" '
+                'ON CONFLICT DO NOTHING'
+            )
+            return cursor.rowcount
+
+    def warn_delay(self):
+        """
+        Штамп в кеше этой команды другие процессы не видят: их индекс
+        ингредиентов обновится, когда истечёт их собственный штамп.
+        """
+        timeout = versions.stamp_timeout()
+        if timeout is not None:
+            self.stdout.write(self.style.WARNING(
+                'Кеш не общий для процессов: запущенный сервер покажет '
+                f'новые ингредиенты не позже чем через {timeout} с'
+            ))
+
     def handle(self, *args, **options):
-        file_path = str(settings.BASE_DIR / 'data' / 'ingredients.json')
-        with open(file_path, 'r', encoding="utf8") as inp_f:
-            reader = json.load(inp_f)
-            for row in reader:
-                name = row['name']
-                measurement_unit = row['measurement_unit']
-                if not Ingredient.objects.filter(name=name).exists():
-                    ingredient = Ingredient(
-                        name=name,
-                        measurement_unit=measurement_unit
-                    )
-                    ingredient.save()
-        self.stdout.write(self.style.SUCCESS('Ингредиенты успешно добавлены'))
+        start = time.perf_counter()
+        # Уникальный ключ ингредиента - пара (название, единица измерения)
+        seen = set(
+            Ingredient.objects.values_list('name', 'measurement_unit')
+        )
+        new = []
+        skipped = 0
+        for name, measurement_unit in self.read_rows(options['path']):
+            key = name.strip(), measurement_unit.strip()
+            if not all(key) or key in seen:
+                skipped += 1
+                continue
+            seen.add(key)
+            new.append(Ingredient(name=key[0], measurement_unit=key[1]))
+
+        added = len(new)
+        with transaction.atomic():
+            if new and connection.vendor == 'postgresql':
+                added = self.copy_ingredients(new)
+                skipped += len(new) - added
+            elif new:
+                Ingredient.objects.bulk_create(
+                    new, batch_size=BATCH_SIZE, ignore_conflicts=True
+                )
+        # bulk_create и COPY не отправляют сигналы моделей.
+        if added:
+            versions.bump_version(versions.INGREDIENTS)
+            self.warn_delay()
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Ингредиенты загружены за {time.perf_counter() - start:.2f} с: '
+            f'добавлено {added}, пропущено {skipped}'
+        ))
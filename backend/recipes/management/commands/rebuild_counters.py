@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from recipes.counters import find_mismatches, rebuild_counters
+
+
+class Command(BaseCommand):
+    help = 'Пересчёт и проверка денормализованных счётчиков'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--check',
+            action='store_true',
+            help='Только проверить счётчики, не исправляя их.',
+        )
+
+    def handle(self, *args, **options):
+        if not options['check']:
+            with transaction.atomic():
+                rebuild_counters()
+        mismatches = find_mismatches()
+        for counter, count in mismatches.items():
+            self.stdout.write(f'{counter}: расхождений {count}')
+        if any(mismatches.values()):
+            self.stderr.write(self.style.ERROR('Счётчики не совпадают'))
+            raise SystemExit(1)
+        self.stdout.write(self.style.SUCCESS('Счётчики в порядке'))
@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from recipes.feed import rebuild_inbox
+from recipes.models import FeedItem
+
+
+class Command(BaseCommand):
+    help = 'Заполнение лент подписок пользователей'
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            rebuild_inbox()
+        self.stdout.write(self.style.SUCCESS(
+            f'Ленты заполнены, записей: {FeedItem.objects.count()}'
+        ))
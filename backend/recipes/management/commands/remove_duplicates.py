@@ -1,23 +1,29 @@
 from django.core.management.base import BaseCommand
-from django.db.models import Count
+from django.db import transaction
 
-from recipes.models import Ingredient
+from recipes import versions
+from recipes.duplicates import merge_duplicate_ingredients
 
 
 class Command(BaseCommand):
-    help = 'Удаление дубликатов ингердиентов из БД'
+    help = 'Удаление дубликатов ингредиентов из БД'
 
     def handle(self, *args, **options):
-        duplicates = (
-            Ingredient.objects.values('name')
-            .annotate(name_count=Count('name'))
-            .filter(name_count__gt=1)
-        )
+        with transaction.atomic():
+            removed, merged = merge_duplicate_ingredients()
+        if removed:
+            # Массовые операции не отправляют сигналы моделей.
+            versions.bump_version(versions.INGREDIENTS)
+            versions.bump_version(versions.RECIPES)
 
-        for item in duplicates:
-            name = item['name']
-            ingredients = Ingredient.objects.filter(name=name)
-            first_ingredient = ingredients.first()
-            ingredients.exclude(pk=first_ingredient.pk).delete()
-
-        self.stdout.write(self.style.SUCCESS('Дубликаты успешно удалены'))
+        self.stdout.write(self.style.SUCCESS(
+            f'Дубликаты успешно удалены: ингредиентов {removed}, '
+            f'объединено строк рецептов {merged}'
+        ))
+        timeout = versions.stamp_timeout()
+        if removed and timeout is not None:
+            # Новые штампы записаны только в кеш этой команды.
+            self.stdout.write(self.style.WARNING(
+                'Кеш не общий для процессов: запущенный сервер перестанет '
+                f'показывать дубликаты не позже чем через {timeout} с'
+            ))
@@ -0,0 +1,62 @@
+# Generated by Django 3.2 on 2026-10-18 04:27
+
+from django.contrib.postgres.operations import TrigramExtension
+import django.core.validators
+from django.db import migrations, models
+
+
+class RunSQLPostgres(migrations.RunSQL):
+    """
+    Триграммные GIN-индексы создаются только в PostgreSQL,
+    в остальных БД (SQLite для локальной разработки) - пропускаются.
+    Индексы не описаны в Meta.indexes моделей, иначе SQLite пытался бы
+    создать их при каждом пересоздании таблицы.
+    """
+
+    def database_forwards(self, app_label, schema_editor, from_state,
+                          to_state):
+        if schema_editor.connection.vendor == 'postgresql':
+            super().database_forwards(
+                app_label, schema_editor, from_state, to_state
+            )
+
+    def database_backwards(self, app_label, schema_editor, from_state,
+                           to_state):
+        if schema_editor.connection.vendor == 'postgresql':
+            super().database_backwards(
+                app_label, schema_editor, from_state, to_state
+            )
+
+
+TRIGRAM_INDEXES = (
+    ('ingredient_name_trgm', 'recipes_ingredient', 'name'),
+    ('recipe_name_trgm', 'recipes_recipe', 'name'),
+    ('recipe_text_trgm', 'recipes_recipe', 'text'),
+)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0014_auto_20240416_0031'),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        migrations.AlterField(
+            model_name='ingredientamount',
+            name='amount',
+            field=models.PositiveSmallIntegerField(default=1, validators=[django.core.validators.MinValueValidator(1, message='Минимальное количество 1'), django.core.validators.MaxValueValidator(32000, message='Максимальное количество 32000')], verbose_name='Количество ингредиента'),
+        ),
+    ] + [
+        # UPPER() совпадает с SQL, который Django строит для icontains
+        # и istartswith, поэтому эти фильтры используют индекс
+        RunSQLPostgres(
+            sql=(
+                f'CREATE INDEX IF NOT EXISTS {name} ON {table} '
+                f'USING gin (UPPER({column}) gin_trgm_ops);'
+            ),
+            reverse_sql=f'DROP INDEX IF EXISTS {name};',
+        )
+        for name, table, column in TRIGRAM_INDEXES
+    ]
@@ -0,0 +1,85 @@
+# Generated by Django 3.2 on 2026-10-18 04:37
+
+from django.db import migrations
+from django.db.models import Count, Min
+
+# Копия recipes.duplicates на момент миграции: миграция не импортирует
+# код приложения, который может измениться.
+MAX_INGREDIENT_AMOUNT = 32000
+
+
+def find_duplicates(Ingredient):
+    """Соответствие id дубликата -> наименьший id среди одинаковых."""
+    groups = (
+        Ingredient.objects.order_by()
+        .values('name', 'measurement_unit')
+        .annotate(keep=Min('pk'), total=Count('pk'))
+        .filter(total__gt=1)
+    )
+    keep = {
+        (group['name'], group['measurement_unit']): group['keep']
+        for group in groups
+    }
+    if not keep:
+        return {}
+    rows = Ingredient.objects.filter(
+        name__in={name for name, _ in keep}
+    ).values_list('pk', 'name', 'measurement_unit')
+    return {
+        pk: keep[(name, unit)]
+        for pk, name, unit in rows
+        if (name, unit) in keep and pk != keep[(name, unit)]
+    }
+
+
+def merge_duplicates(apps, schema_editor):
+    Ingredient = apps.get_model('recipes', 'Ingredient')
+    IngredientAmount = apps.get_model('recipes', 'IngredientAmount')
+    mapping = find_duplicates(Ingredient)
+    if not mapping:
+        return
+
+    amounts = IngredientAmount.objects.filter(
+        ingredient_id__in=set(mapping) | set(mapping.values())
+    ).order_by('pk')
+    survivors = {}
+    changed = {}
+    merged = []
+    for amount in amounts:
+        target = mapping.get(amount.ingredient_id, amount.ingredient_id)
+        key = (amount.recipe_id, target)
+        survivor = survivors.get(key)
+        if survivor is None:
+            survivors[key] = amount
+            if amount.ingredient_id != target:
+                amount.ingredient_id = target
+                changed[amount.pk] = amount
+            continue
+        if amount.ingredient_id == target:
+            survivors[key], survivor, amount = amount, amount, survivor
+            changed.pop(amount.pk, None)
+        survivor.amount = min(
+            survivor.amount + amount.amount, MAX_INGREDIENT_AMOUNT
+        )
+        changed[survivor.pk] = survivor
+        merged.append(amount.pk)
+
+    IngredientAmount.objects.filter(pk__in=merged).delete()
+    IngredientAmount.objects.bulk_update(
+        changed.values(), ('ingredient', 'amount'), batch_size=1000
+    )
+    Ingredient.objects.filter(pk__in=mapping).delete()
+
+
+class Migration(migrations.Migration):
+    # Ограничение уникальности добавляется отдельной миграцией:
+    # PostgreSQL не даёт менять таблицу в транзакции с отложенными
+    # проверками внешних ключей.
+
+    dependencies = [
+        ('recipes', '0018_feed_item'),
+    ]
+
+    operations = [
+        migrations.RunPython(merge_duplicates, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 3.2 on 2026-10-18 04:48
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+    # Таблица связей рецептов и тегов создаётся Django автоматически,
+    # поэтому индекс под фильтр по тегам добавляется SQL-запросом.
+
+    dependencies = [
+        ('recipes', '0021_recipe_image_renditions'),
+    ]
+
+    operations = [
+        migrations.RunSQL(
+            sql=(
+                'CREATE INDEX IF NOT EXISTS recipe_tags_tag_recipe_idx '
+                'ON recipes_recipe_tags (tag_id, recipe_id);'
+            ),
+            reverse_sql='DROP INDEX IF EXISTS recipe_tags_tag_recipe_idx;',
+        ),
+    ]
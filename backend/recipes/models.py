@@ -3,6 +3,11 @@ from django.contrib.auth import get_user_model
 from django.core import validators
 from django.conf import settings
 from django.db import models
+from django.db.models import (Count, Exists, IntegerField, OuterRef,
+                              Prefetch, Subquery)
+from django.db.models.functions import Coalesce
+
+from users.models import Follow
 
 User = get_user_model()
 
@@ -28,6 +33,12 @@ class Ingredient(models.Model):
         ordering = ('name',)
         verbose_name = 'Ингредиент'
         verbose_name_plural = 'Ингредиенты'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['name', 'measurement_unit'],
+                name='unique_ingredient'
+            )
+        ]
 
     def __str__(self):
         """Название Ингредиента."""
@@ -62,6 +73,93 @@ class Tag(models.Model):
         return self.name
 
 
+class RecipeQuerySet(models.QuerySet):
+    """Запросы к рецептам."""
+
+    def with_related(self):
+        """
+        План чтения рецепта: автор, теги и ингредиенты с количеством
+        загружаются заранее фиксированным числом запросов.
+        """
+        return self.select_related('author').prefetch_related(
+            # Остальные поля тегов берутся из справочника в памяти
+            Prefetch('tags', queryset=Tag.objects.only('id')),
+            Prefetch(
+                'ingredient',
+                queryset=IngredientAmount.objects.select_related(
+                    'ingredient'
+                ).order_by('ingredient__name'),
+            ),
+        )
+
+    def with_any_tag(self, tag_ids):
+        """
+        Рецепты хотя бы с одним из тегов. EXISTS по таблице связей
+        не размножает строки, в отличие от JOIN, и использует индекс
+        (tag_id, recipe_id).
+        """
+        return self.filter(Exists(
+            Recipe.tags.through.objects.filter(
+                recipe_id=OuterRef('pk'), tag_id__in=tag_ids
+            )
+        ))
+
+    def order_by_popularity(self, since=None):
+        """
+        Сначала самые добавляемые в избранное рецепты: за всё время
+        по счётчику favorites_count или начиная с момента since.
+
+        Сортировку за всё время обслуживает индекс recipe_popular_idx.
+        Сортировка за период индексом не обслуживается: число добавлений
+        считается подзапросом для каждого рецепта (сам подсчёт идёт по
+        индексу favorite_recipe_added_idx), поэтому период ограничен
+        в фильтре, а пагинация по курсору для неё недоступна.
+        """
+        if since is None:
+            return self.order_by('-favorites_count', '-pub_date', '-id')
+        recent_favorites = (
+            Favorite.objects
+            .filter(recipe=OuterRef('pk'), when_added__gte=since)
+            .order_by()
+            .values('recipe')
+            .annotate(total=Count('pk'))
+            .values('total')
+        )
+        return self.annotate(recent_favorites=Coalesce(
+            Subquery(recent_favorites, output_field=IntegerField()), 0
+        )).order_by('-recent_favorites', '-pub_date', '-id')
+
+    def limit_per_author(self, limit):
+        """
+        Не больше limit последних рецептов каждого автора.
+        Коррелированный подзапрос отбирает id последних limit рецептов
+        того же автора; id — второй ключ сортировки при равных датах.
+        """
+        ranked = Recipe.objects.filter(
+            author=OuterRef('author')
+        ).order_by('-pub_date', '-id').values('pk')[:limit]
+        return self.filter(pk__in=Subquery(ranked))
+
+    def add_user_annotations(self, user):
+        """
+        Флаги избранного, корзины и подписки на автора для пользователя,
+        вычисляемые подзапросами EXISTS в том же запросе.
+        """
+        if user.is_anonymous:
+            return self
+        return self.annotate(
+            is_favorited=Exists(Favorite.objects.filter(
+                user=user, recipe=OuterRef('pk')
+            )),
+            is_in_shopping_cart=Exists(ShoppingCart.objects.filter(
+                user=user, recipe=OuterRef('pk')
+            )),
+            is_author_subscribed=Exists(Follow.objects.filter(
+                user=user, author=OuterRef('author')
+            )),
+        )
+
+
 class Recipe(models.Model):
     """Модель Рецепта."""
     name = models.CharField(
@@ -96,9 +194,25 @@ class Recipe(models.Model):
         blank=True,
         verbose_name='Картинка рецепта',
     )
+    image_renditions = models.JSONField(
+        default=dict,
+        blank=True,
+        editable=False,
+        verbose_name='Варианты картинки',
+    )
     text = models.TextField(
         verbose_name='Описание рецепта',
     )
+    favorites_count = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name='Добавлений в избранное',
+    )
+    shopping_cart_count = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name='Добавлений в корзину',
+    )
     cooking_time = models.PositiveSmallIntegerField(
         validators=[
             validators.MinValueValidator(
@@ -113,10 +227,26 @@ class Recipe(models.Model):
         verbose_name='Время приготовления (в минутах)',
     )
 
+    objects = RecipeQuerySet.as_manager()
+
     class Meta:
         ordering = ('-pub_date',)
         verbose_name = 'Рецепт'
         verbose_name_plural = 'Рецепты'
+        indexes = [
+            # Индексы под сортировки ленты: новые, популярные, быстрые
+            models.Index(
+                fields=['-pub_date', '-id'], name='recipe_newest_idx'
+            ),
+            models.Index(
+                fields=['-favorites_count', '-pub_date', '-id'],
+                name='recipe_popular_idx'
+            ),
+            models.Index(
+                fields=['cooking_time', '-pub_date', '-id'],
+                name='recipe_quickest_idx'
+            ),
+        ]
 
     def __str__(self):
         """Название Рецепта."""
@@ -190,6 +320,13 @@ class Favorite(models.Model):
         ordering = ['recipe']
         verbose_name = 'Избранный рецепт'
         verbose_name_plural = 'Избранные рецепты'
+        indexes = [
+            # Подсчёт добавлений рецепта в избранное за период
+            models.Index(
+                fields=['recipe', 'when_added'],
+                name='favorite_recipe_added_idx'
+            ),
+        ]
         constraints = [
             models.UniqueConstraint(
                 fields=['user', 'recipe'],
@@ -230,3 +367,42 @@ class ShoppingCart(models.Model):
     def __str__(self):
         """Список покупок пользователя."""
         return f'{self.user} - {self.recipe}'
+
+
+class FeedItem(models.Model):
+    """Модель записи ленты подписок пользователя."""
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='feed_items',
+        verbose_name='Подписчик',
+    )
+    recipe = models.ForeignKey(
+        Recipe,
+        on_delete=models.CASCADE,
+        related_name='feed_items',
+        verbose_name='Рецепт автора',
+    )
+    pub_date = models.DateTimeField(
+        verbose_name='Дата публикации рецепта',
+    )
+
+    class Meta:
+        verbose_name = 'Запись ленты'
+        verbose_name_plural = 'Записи ленты'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'recipe'],
+                name='unique_feed_item'
+            )
+        ]
+        indexes = [
+            models.Index(
+                fields=['user', '-pub_date', '-recipe'],
+                name='feed_item_user_date_idx'
+            ),
+        ]
+
+    def __str__(self):
+        """Подписчик - Рецепт."""
+        return f'{self.user} - {self.recipe}'
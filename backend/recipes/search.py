@@ -0,0 +1,50 @@
+from django.contrib.postgres.search import TrigramSimilarity
+from django.db import connection
+from django.db.models import Q
+from django.db.models.functions import Greatest, Upper
+
+
+def is_postgres():
+    return connection.vendor == 'postgresql'
+
+
+def search_recipes(queryset, query):
+    """
+    Поиск рецептов по названию и описанию.
+
+    В PostgreSQL подстрока ищется через триграммные индексы по UPPER(name)
+    и UPPER(text), а название дополнительно сравнивается нечётко;
+    результаты упорядочены по схожести. В SQLite - только подстрока.
+    """
+    substring = Q(name__icontains=query) | Q(text__icontains=query)
+    if not is_postgres():
+        return queryset.filter(substring)
+    query_upper = query.upper()
+    return queryset.annotate(
+        name_upper=Upper('name'),
+        similarity=Greatest(
+            TrigramSimilarity(Upper('name'), query_upper),
+            TrigramSimilarity(Upper('text'), query_upper),
+        ),
+    ).filter(
+        substring | Q(name_upper__trigram_similar=query_upper)
+    ).order_by('-similarity', '-pub_date')
+
+
+def search_ingredients_fuzzy(queryset, query):
+    """
+    Нечёткий поиск ингредиентов с учётом опечаток.
+
+    В PostgreSQL используется триграммная схожесть по индексу UPPER(name),
+    в SQLite - поиск подстроки.
+    """
+    if not is_postgres():
+        return queryset.filter(name__icontains=query)
+    query_upper = query.upper()
+    return queryset.annotate(
+        name_upper=Upper('name'),
+        similarity=TrigramSimilarity(Upper('name'), query_upper),
+    ).filter(
+        Q(name__istartswith=query)
+        | Q(name_upper__trigram_similar=query_upper)
+    ).order_by('-similarity', 'name')
@@ -0,0 +1,127 @@
+from django.conf import settings
+from django.db.models.signals import (m2m_changed, post_delete, post_save,
+                                      pre_save)
+from django.dispatch import receiver
+
+from recipes import feed, images, versions
+from recipes.counters import update_counter
+from recipes.models import (Favorite, Ingredient, IngredientAmount, Recipe,
+                            ShoppingCart, Tag)
+from recipes.tag_catalog import tag_catalog
+from users.models import Follow, User
+
+
+@receiver([post_save, post_delete], sender=Ingredient)
+def ingredients_changed(**kwargs):
+    versions.bump_version(versions.INGREDIENTS)
+
+
+@receiver([post_save, post_delete], sender=Recipe)
+@receiver([post_save, post_delete], sender=IngredientAmount)
+@receiver([post_save, post_delete], sender=Tag)
+@receiver(m2m_changed, sender=Recipe.tags.through)
+def recipes_changed(**kwargs):
+    versions.bump_version(versions.RECIPES)
+
+
+@receiver([post_save, post_delete], sender=Tag)
+def tags_changed(**kwargs):
+    versions.bump_version(versions.TAGS)
+    tag_catalog.invalidate()
+
+
+@receiver([post_save, post_delete], sender=Favorite)
+@receiver([post_save, post_delete], sender=ShoppingCart)
+@receiver([post_save, post_delete], sender=Follow)
+def user_data_changed(instance, **kwargs):
+    versions.bump_version(versions.user_data(instance.user_id))
+
+
+@receiver(post_save, sender=Favorite)
+def favorite_created(instance, created, raw=False, **kwargs):
+    if created and not raw:
+        update_counter(Recipe, instance.recipe_id, 'favorites_count', 1)
+
+
+@receiver(post_delete, sender=Favorite)
+def favorite_deleted(instance, **kwargs):
+    update_counter(Recipe, instance.recipe_id, 'favorites_count', -1)
+
+
+@receiver(post_save, sender=ShoppingCart)
+def shopping_cart_created(instance, created, raw=False, **kwargs):
+    if created and not raw:
+        update_counter(Recipe, instance.recipe_id, 'shopping_cart_count', 1)
+
+
+@receiver(post_delete, sender=ShoppingCart)
+def shopping_cart_deleted(instance, **kwargs):
+    update_counter(Recipe, instance.recipe_id, 'shopping_cart_count', -1)
+
+
+@receiver(post_save, sender=Recipe)
+def recipe_created(instance, created, raw=False, **kwargs):
+    if created and not raw:
+        update_counter(User, instance.author_id, 'recipes_count', 1)
+
+
+@receiver(post_delete, sender=Recipe)
+def recipe_deleted(instance, **kwargs):
+    update_counter(User, instance.author_id, 'recipes_count', -1)
+
+
+@receiver(post_save, sender=Follow)
+def follow_created(instance, created, raw=False, **kwargs):
+    if created and not raw:
+        update_counter(User, instance.author_id, 'followers_count', 1)
+
+
+@receiver(post_delete, sender=Follow)
+def follow_deleted(instance, **kwargs):
+    update_counter(User, instance.author_id, 'followers_count', -1)
+
+
+@receiver(post_save, sender=Recipe)
+def recipe_fan_out(instance, created, raw=False, **kwargs):
+    if created and not raw and settings.FEED_INBOX_ENABLED:
+        feed.fan_out_recipe(instance)
+
+
+@receiver(post_save, sender=Follow)
+def follow_fill_feed(instance, created, raw=False, **kwargs):
+    if created and not raw and settings.FEED_INBOX_ENABLED:
+        feed.add_author_to_feed(instance)
+
+
+@receiver(post_delete, sender=Follow)
+def follow_clear_feed(instance, **kwargs):
+    if settings.FEED_INBOX_ENABLED:
+        feed.remove_author_from_feed(instance)
+
+
+@receiver(post_save, sender=Recipe)
+def recipe_image_changed(instance, raw=False, **kwargs):
+    renditions = instance.image_renditions or {}
+    if (
+        not raw and instance.image
+        and renditions.get('source') != instance.image.name
+    ):
+        images.schedule_renditions(instance)
+
+
+@receiver(pre_save, sender=Recipe)
+def recipe_image_replaced(instance, raw=False, **kwargs):
+    if raw or instance._state.adding:
+        return
+    old = Recipe.objects.filter(pk=instance.pk).values(
+        'image', 'image_renditions'
+    ).first()
+    if old and old['image'] != instance.image.name:
+        # Варианты старой картинки больше не относятся к рецепту.
+        instance.image_renditions = {}
+        images.release_image(old['image'], old['image_renditions'])
+
+
+@receiver(post_delete, sender=Recipe)
+def recipe_image_deleted(instance, **kwargs):
+    images.release_image(instance.image.name, instance.image_renditions)
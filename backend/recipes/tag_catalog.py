@@ -0,0 +1,100 @@
+import threading
+import time
+
+from recipes import versions
+from recipes.models import Tag
+
+
+class TagCatalog:
+    """
+    Справочник тегов в памяти процесса.
+
+    Теги почти не меняются, поэтому загружаются один раз и хранятся
+    вместе с готовым представлением для API. Справочник перестраивается,
+    когда меняется штамп версии тегов или приходит сигнал об изменении
+    тега в этом процессе. Если запрошенного тега в справочнике нет,
+    он перечитывается сразу: тег мог появиться в другом процессе.
+    Такие перечитывания идут не чаще раза в FORCED_RELOAD_INTERVAL
+    секунд, чтобы запросы с несуществующими тегами не ходили в БД.
+    """
+    BY_ID, BY_SLUG = range(2)
+    FORCED_RELOAD_INTERVAL = 1
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._version = None
+        self._forced_at = None
+        # Оба словаря заменяются одним кортежем, чтобы читатель
+        # не получил теги из разных загрузок.
+        self._tags = ({}, {})
+
+    def _build(self):
+        by_id = {
+            tag.id: {
+                'id': tag.id,
+                'name': tag.name,
+                'color': tag.color,
+                'slug': tag.slug,
+            }
+            for tag in Tag.objects.all()
+        }
+        self._tags = (
+            by_id, {tag['slug']: tag for tag in by_id.values()}
+        )
+
+    def _refresh(self, force=False):
+        version = versions.get_version(versions.TAGS)
+        if version == self._version and not force:
+            return
+        with self._lock:
+            if version != self._version:
+                self._build()
+                self._version = version
+            elif force and self._can_force():
+                self._build()
+                self._forced_at = time.monotonic()
+
+    def _can_force(self):
+        return (
+            self._forced_at is None
+            or time.monotonic() - self._forced_at
+            >= self.FORCED_RELOAD_INTERVAL
+        )
+
+    def _get(self, index, keys):
+        """
+        Теги по ключам; при промахе справочник перечитывается, если
+        с прошлого такого перечитывания прошло достаточно времени.
+        """
+        self._refresh()
+        tags = self._tags[index]
+        if not all(key in tags for key in keys):
+            self._refresh(force=True)
+            tags = self._tags[index]
+        return [tags[key] for key in keys if key in tags]
+
+    def invalidate(self):
+        self._version = None
+        self._forced_at = None
+
+    def slug_choices(self):
+        """Варианты для фильтра по slug в порядке тегов из БД."""
+        self._refresh()
+        return [
+            (slug, tag['name'])
+            for slug, tag in self._tags[self.BY_SLUG].items()
+        ]
+
+    def ensure_slugs(self, slugs):
+        """Перечитывает справочник, если какого-то из slug в нём нет."""
+        self._get(self.BY_SLUG, slugs)
+
+    def ids_for_slugs(self, slugs):
+        return [tag['id'] for tag in self._get(self.BY_SLUG, slugs)]
+
+    def represent(self, tag_ids):
+        """Представление тегов для API по их id."""
+        return self._get(self.BY_ID, list(tag_ids))
+
+
+tag_catalog = TagCatalog()
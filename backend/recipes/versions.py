@@ -0,0 +1,60 @@
+import time
+
+from django.conf import settings
+from django.core.cache import cache, caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+
+# Имена наборов данных, для которых ведутся штампы версий
+INGREDIENTS = 'ingredients'
+RECIPES = 'recipes'
+TAGS = 'tags'
+
+KEY_PREFIX = 'data_version'
+
+
+def user_data(user_id):
+    """
+    Имя набора данных пользователя: избранное, корзина и подписки.
+    """
+    return f'user:{user_id}'
+
+
+def user_auth(user_id):
+    """
+    Имя набора учётных данных пользователя: токены и статус активности.
+    """
+    return f'auth:{user_id}'
+
+
+def is_shared():
+    """
+    Общий ли кеш у всех процессов. Кеш в памяти процесса не видит
+    изменений, сделанных в других воркерах и management-командах.
+    """
+    return not isinstance(caches['default'], (LocMemCache, DummyCache))
+
+
+def stamp_timeout():
+    """
+    Срок жизни штампа. В общем кеше штамп бессрочный, в кеше процесса
+    живёт VERSION_STAMP_TIMEOUT секунд: по его истечении зависящие
+    от штампа кеши и индексы в памяти перестраиваются.
+    """
+    return None if is_shared() else settings.VERSION_STAMP_TIMEOUT
+
+
+def get_version(name):
+    """
+    Текущая версия набора данных: время его последнего изменения.
+    """
+    return cache.get_or_set(
+        f'{KEY_PREFIX}:{name}', time.time(), stamp_timeout()
+    )
+
+
+def bump_version(name):
+    """
+    Отмечает изменение набора данных, сбрасывая зависящие от него кеши.
+    """
+    cache.set(f'{KEY_PREFIX}:{name}', time.time(), stamp_timeout())
@@ -33,6 +33,16 @@ class User(AbstractUser):
         verbose_name='Подписка',
         help_text='Подписатся'
     )
+    recipes_count = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name='Количество рецептов',
+    )
+    followers_count = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name='Количество подписчиков',
+    )
 
     class Meta:
         ordering = ('username', )
@@ -1,4 +1,7 @@
 from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models import (BooleanField, Exists, OuterRef, Prefetch, Value,
+                              prefetch_related_objects)
 from django.shortcuts import get_object_or_404
 from djoser.views import UserViewSet
 from rest_framework import status
@@ -6,8 +9,11 @@ from rest_framework.decorators import action
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 
+from api.pagination import CustomPagination
 from api.permissions import CreateOrAuthenticatedUser
 from api.serializers import CustomUserSerializer, SubscriptionSerializer
+from recipes import versions
+from recipes.models import Recipe
 from users.models import Follow
 
 User = get_user_model()
@@ -17,12 +23,33 @@ class CustomUserViewSet(UserViewSet):
     queryset = User.objects.all()
     serializer_class = CustomUserSerializer
     permission_classes = (CreateOrAuthenticatedUser,)
+    pagination_class = CustomPagination
+    cursor_ordering = ('username',)
+
+    def get_count_versions(self, request):
+        """
+        Количество подписок зависит от данных пользователя. Для списка
+        пользователей штампа нет, и количество считается каждый раз.
+        """
+        if self.action != 'subscriptions':
+            return None
+        return [versions.get_version(versions.user_data(request.user.id))]
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        user = self.request.user
+        if user.is_anonymous:
+            return queryset
+        return queryset.annotate(subscribed=Exists(
+            Follow.objects.filter(user=user, author=OuterRef('pk'))
+        ))
 
     @action(
         detail=True,
         methods=['post', 'delete'],
         permission_classes=[IsAuthenticated]
     )
+    @transaction.atomic
     def subscribe(self, request, id):
         subscriber = request.user
         target_user = get_object_or_404(User, pk=id)
@@ -67,8 +94,18 @@ class CustomUserViewSet(UserViewSet):
     )
     def subscriptions(self, request):
         subscriber = request.user
-        queryset = User.objects.filter(following__user=subscriber)
+        queryset = User.objects.filter(following__user=subscriber).annotate(
+            subscribed=Value(True, output_field=BooleanField()),
+        )
         page = self.paginate_queryset(queryset)
+        recipes = Recipe.objects.filter(author__in=page).only(
+            'id', 'name', 'image', 'image_renditions', 'cooking_time',
+            'author'
+        )
+        recipes_limit = request.query_params.get('recipes_limit', '')
+        if recipes_limit.isdigit():
+            recipes = recipes.limit_per_author(int(recipes_limit))
+        prefetch_related_objects(page, Prefetch('recipes', queryset=recipes))
         serializer = SubscriptionSerializer(
             page,
             many=True,
@@ -0,0 +1,106 @@
+import pytest
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from recipes.models import Ingredient, IngredientAmount, Recipe, Tag
+from users.models import User
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    # Кеш в памяти процесса переживает откат транзакции теста.
+    cache.clear()
+    yield
+    cache.clear()
+
+
+@pytest.fixture(autouse=True)
+def media_root(settings, tmp_path):
+    settings.MEDIA_ROOT = str(tmp_path)
+
+
+@pytest.fixture
+def user(django_user_model):
+    return django_user_model.objects.create_user(
+        email='user@foodgram.ru', username='user', first_name='Иван',
+        last_name='Иванов', password='Pass-12345'
+    )
+
+
+@pytest.fixture
+def author(django_user_model):
+    return django_user_model.objects.create_user(
+        email='author@foodgram.ru', username='author', first_name='Пётр',
+        last_name='Петров', password='Pass-12345'
+    )
+
+
+@pytest.fixture
+def user_client(user):
+    client = APIClient()
+    client.force_authenticate(user)
+    return client
+
+
+@pytest.fixture
+def tags(db):
+    return [
+        Tag.objects.create(name=f'Тег {i}', color='#00FF00', slug=f'tag{i}')
+        for i in range(3)
+    ]
+
+
+@pytest.fixture
+def ingredients(db):
+    return [
+        Ingredient.objects.create(name=f'Продукт {i}', measurement_unit='г')
+        for i in range(5)
+    ]
+
+
+@pytest.fixture
+def make_recipe(author, tags, ingredients):
+    """Фабрика рецептов с тегами и ингредиентами."""
+    def make(author=author, name='Рецепт', amount=10):
+        recipe = Recipe.objects.create(
+            author=author, name=name, text='Описание', cooking_time=10
+        )
+        recipe.tags.set(tags[:2])
+        IngredientAmount.objects.bulk_create(
+            IngredientAmount(recipe=recipe, ingredient=ingredient,
+                             amount=amount)
+            for ingredient in ingredients
+        )
+        return recipe
+    return make
+
+
+@pytest.fixture
+def make_users(db):
+    """Фабрика пачки пользователей без паролей."""
+    def make(count, prefix='reader'):
+        return [
+            User.objects.create(
+                email=f'{prefix}{i}@foodgram.ru', username=f'{prefix}{i}',
+                first_name=prefix, last_name=prefix
+            )
+            for i in range(count)
+        ]
+    return make
+
+
+@pytest.fixture
+def count_queries():
+    """
+    Число запросов к БД при вызове функции. Потоковый ответ
+    читается целиком, иначе его запросы не попадут в подсчёт.
+    """
+    def count(func, *args, **kwargs):
+        with CaptureQueriesContext(connection) as context:
+            response = func(*args, **kwargs)
+            if getattr(response, 'streaming', False):
+                b''.join(response.streaming_content)
+        return len(context.captured_queries)
+    return count
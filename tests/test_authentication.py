@@ -0,0 +1,92 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.authtoken.models import Token
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework.test import APIClient
+
+from api.authentication import (CachingTokenAuthentication, TokenCache,
+                                token_cache)
+
+URL = '/api/users/me/'
+
+
+@pytest.fixture(autouse=True)
+def clear_token_cache():
+    token_cache.clear()
+    yield
+    token_cache.clear()
+
+
+@pytest.fixture
+def shared_cache(settings, tmp_path):
+    settings.CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+            'LOCATION': str(tmp_path / 'cache'),
+        }
+    }
+
+
+@pytest.fixture
+def token_client(user):
+    token = Token.objects.create(user=user)
+    client = APIClient()
+    client.credentials(HTTP_AUTHORIZATION=f'Token {token.key}')
+    return client
+
+
+def token_queries(client):
+    with CaptureQueriesContext(connection) as context:
+        response = client.get(URL)
+    assert response.status_code == 200
+    return [
+        query['sql'] for query in context.captured_queries
+        if 'authtoken_token' in query['sql']
+    ]
+
+
+@pytest.mark.django_db
+def test_token_checked_in_db_without_shared_cache(user, token_client):
+    assert len(token_queries(token_client)) == 1
+    assert len(token_queries(token_client)) == 1
+    user.auth_token.delete()
+    assert token_client.get(URL).status_code == 401
+
+
+@pytest.mark.django_db
+def test_token_cached_with_shared_cache(user, token_client, shared_cache):
+    assert len(token_queries(token_client)) == 1
+    assert token_queries(token_client) == []
+    user.is_active = False
+    user.save()
+    assert token_client.get(URL).status_code == 401
+
+
+def process_authentication():
+    """Аутентификация «другого процесса»: свой кеш токенов в памяти."""
+    authentication = CachingTokenAuthentication()
+    authentication.cache = TokenCache()
+    return authentication
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('revoke', ['delete_token', 'deactivate'])
+def test_token_revoked_in_one_process_is_seen_by_another(
+    user, shared_cache, revoke
+):
+    key = Token.objects.create(user=user).key
+    first, second = process_authentication(), process_authentication()
+    for authentication in (first, second):
+        assert authentication.authenticate_credentials(key)[0] == user
+    with CaptureQueriesContext(connection) as context:
+        second.authenticate_credentials(key)
+    assert context.captured_queries == []
+    # Изменение в первом процессе: сигналы меняют штамп в общем кеше
+    if revoke == 'delete_token':
+        Token.objects.get(key=key).delete()
+    else:
+        user.is_active = False
+        user.save()
+    with pytest.raises(AuthenticationFailed):
+        second.authenticate_credentials(key)
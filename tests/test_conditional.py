@@ -0,0 +1,66 @@
+import pytest
+
+from recipes.models import Ingredient
+
+URL = '/api/ingredients/'
+
+
+@pytest.fixture
+def shared_cache(settings, tmp_path):
+    settings.CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+            'LOCATION': str(tmp_path / 'cache'),
+        }
+    }
+
+
+@pytest.mark.django_db
+def test_no_etag_without_shared_cache(client, ingredients):
+    response = client.get(URL)
+    assert response.status_code == 200
+    assert 'ETag' not in response
+
+
+@pytest.mark.django_db
+def test_etag_with_shared_cache(client, ingredients, shared_cache):
+    response = client.get(URL)
+    etag = response['ETag']
+    response = client.get(URL, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == 304
+    Ingredient.objects.create(name='абрикос', measurement_unit='г')
+    response = client.get(URL, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == 200
+    assert response['ETag'] != etag
+
+
+@pytest.mark.django_db
+def test_recipe_detail_etag_follows_recipe_changes(
+    client, make_recipe, shared_cache
+):
+    recipe = make_recipe()
+    url = f'/api/recipes/{recipe.id}/'
+    etag = client.get(url)['ETag']
+    assert client.get(url, HTTP_IF_NONE_MATCH=etag).status_code == 304
+    recipe.name = 'Новое название'
+    recipe.save()
+    response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == 200
+    assert response.json()['name'] == 'Новое название'
+
+
+@pytest.mark.django_db
+def test_if_modified_since_alone_does_not_give_304(
+    client, make_recipe, shared_cache
+):
+    recipe = make_recipe()
+    url = f'/api/recipes/{recipe.id}/'
+    response = client.get(url)
+    assert 'Last-Modified' in response
+    recipe.name = 'Изменён в ту же секунду'
+    recipe.save()
+    response = client.get(
+        url, HTTP_IF_MODIFIED_SINCE=response['Last-Modified']
+    )
+    assert response.status_code == 200
+    assert response.json()['name'] == 'Изменён в ту же секунду'
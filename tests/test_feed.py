@@ -0,0 +1,80 @@
+import re
+from io import StringIO
+from urllib.parse import parse_qs, urlsplit
+
+import pytest
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from recipes.models import FeedItem
+from users.models import Follow
+
+URL = '/api/recipes/feed/'
+
+
+@pytest.fixture
+def inbox(settings):
+    settings.FEED_INBOX_ENABLED = True
+    settings.FEED_INBOX_MIN_FOLLOWING = 1
+
+
+def read_feed(client, limit=2):
+    names, params = [], {'limit': limit}
+    while True:
+        response = client.get(URL, params)
+        assert response.status_code == 200
+        data = response.json()
+        names += [recipe['name'] for recipe in data['results']]
+        if not data['next']:
+            return names
+        params = parse_qs(urlsplit(data['next']).query)
+
+
+@pytest.fixture
+def followed(user, author, make_users, make_recipe):
+    other, = make_users(1, prefix='other')
+    Follow.objects.create(user=user, author=author)
+    recipes = [make_recipe(name=f'Рецепт {i}') for i in range(5)]
+    make_recipe(author=other, name='Чужой')
+    return recipes
+
+
+@pytest.mark.django_db
+def test_join_feed(user_client, followed):
+    assert read_feed(user_client) == [
+        recipe.name for recipe in reversed(followed)
+    ]
+
+
+@pytest.mark.django_db
+def test_inbox_feed_pages_by_feed_items(user, user_client, inbox, followed):
+    assert FeedItem.objects.filter(user=user).count() == len(followed)
+    assert read_feed(user_client) == [
+        recipe.name for recipe in reversed(followed)
+    ]
+    with CaptureQueriesContext(connection) as context:
+        response = user_client.get(URL, {'limit': 2})
+    page = response.json()['results']
+    assert [recipe['name'] for recipe in page] == ['Рецепт 4', 'Рецепт 3']
+    assert page[0]['author']['is_subscribed'] is True
+    paged = [
+        query['sql'] for query in context.captured_queries
+        if re.search(r'LIMIT \d+$', query['sql'])
+    ]
+    assert len(paged) == 1
+    assert 'FROM "recipes_feeditem"' in paged[0]
+    assert 'ORDER BY "recipes_feeditem"."pub_date" DESC' in paged[0]
+
+
+@pytest.mark.django_db
+def test_benchmark_feed_reads_feed_items(inbox, followed):
+    out = StringIO()
+    with CaptureQueriesContext(connection) as context:
+        call_command('benchmark_feed', repeat=1, stdout=out)
+    assert 'В среднем' in out.getvalue()
+    assert any(
+        'FROM "recipes_feeditem"' in query['sql']
+        and 'ORDER BY "recipes_feeditem"."pub_date" DESC' in query['sql']
+        for query in context.captured_queries
+    )
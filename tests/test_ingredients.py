@@ -0,0 +1,70 @@
+import time
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+
+from recipes import versions
+from recipes.models import Ingredient
+
+URL = '/api/ingredients/'
+
+
+def names(client, name):
+    response = client.get(URL, {'name': name})
+    assert response.status_code == 200
+    return [ingredient['name'] for ingredient in response.json()]
+
+
+@pytest.mark.django_db
+def test_ingredient_search_by_prefix(client, ingredients):
+    Ingredient.objects.create(name='абрикос', measurement_unit='г')
+    assert len(names(client, 'прод')) == len(ingredients)
+    assert names(client, 'АБРИК') == ['абрикос']
+
+
+@pytest.mark.django_db
+def test_ingredient_index_sees_changes_from_other_processes(
+    client, ingredients, settings
+):
+    settings.VERSION_STAMP_TIMEOUT = 1
+    versions.bump_version(versions.INGREDIENTS)
+    assert names(client, 'абрикос') == []
+    # bulk_create не отправляет сигналов, как и изменение из другого
+    # процесса: индекс узнаёт о нём, только когда истечёт штамп версии.
+    Ingredient.objects.bulk_create(
+        [Ingredient(name='абрикос', measurement_unit='г')]
+    )
+    assert names(client, 'абрикос') == []
+    time.sleep(1.1)
+    assert names(client, 'абрикос') == ['абрикос']
+
+
+@pytest.mark.django_db
+def test_import_ingredients(client, tmp_path):
+    path = tmp_path / 'ingredients.csv'
+    path.write_text(
+        'абрикос,г\nабрикос,кг\n абрикос , г\nбанан,шт\n', encoding='utf8'
+    )
+    assert names(client, 'абрикос') == []
+    out = StringIO()
+    call_command('import_ingredients', path=str(path), stdout=out)
+    assert 'добавлено 3, пропущено 1' in out.getvalue()
+    assert 'не позже чем через 30 с' in out.getvalue()
+    assert names(client, 'абрикос') == ['абрикос', 'абрикос']
+
+
+@pytest.mark.django_db
+def test_import_ingredients_rerun_with_overlap(tmp_path):
+    path = tmp_path / 'ingredients.csv'
+    path.write_text('абрикос,г\nбанан,шт\n', encoding='utf8')
+    call_command('import_ingredients', path=str(path), stdout=StringIO())
+    path.write_text('банан,шт\nбанан,г\nвишня,кг\n', encoding='utf8')
+    out = StringIO()
+    call_command('import_ingredients', path=str(path), stdout=out)
+    assert 'добавлено 2, пропущено 1' in out.getvalue()
+    assert sorted(Ingredient.objects.filter(
+        name__in=['абрикос', 'банан', 'вишня']
+    ).values_list('name', 'measurement_unit')) == [
+        ('абрикос', 'г'), ('банан', 'г'), ('банан', 'шт'), ('вишня', 'кг')
+    ]
@@ -0,0 +1,108 @@
+import logging
+import threading
+import time
+
+import pytest
+
+from foodgram import logging as foodgram_logging
+from foodgram.logging import TelegramHandler
+
+
+class FakeResponse:
+    def __init__(self, status_code=200, retry_after=None):
+        self.status_code = status_code
+        self.retry_after = retry_after
+        self.text = ''
+
+    def json(self):
+        return {'parameters': {'retry_after': self.retry_after}}
+
+
+@pytest.fixture
+def posts(monkeypatch):
+    """Заглушка requests.post: запоминает тексты и время отправки."""
+    calls = []
+    responses = []
+    release = threading.Event()
+    release.set()
+    entered = threading.Event()
+
+    def post(url, data, timeout):
+        calls.append((time.monotonic(), data['text']))
+        entered.set()
+        release.wait()
+        return responses.pop(0) if responses else FakeResponse()
+
+    monkeypatch.setattr(foodgram_logging.requests, 'post', post)
+    post.calls, post.responses = calls, responses
+    post.release, post.entered = release, entered
+    return post
+
+
+@pytest.fixture
+def make_handler(posts):
+    """Фабрика обработчиков; после теста их потоки останавливаются."""
+    handlers = []
+
+    def make(**kwargs):
+        options = {
+            'batch_interval': 0.2, 'min_send_interval': 0, 'timeout': 2
+        }
+        options.update(kwargs)
+        handlers.append(TelegramHandler('token', 'chat', **options))
+        return handlers[-1]
+    yield make
+    posts.release.set()
+    for handler in handlers:
+        handler.flush(timeout=2)
+
+
+def log(handler, *messages):
+    for message in messages:
+        handler.emit(logging.makeLogRecord({'msg': message}))
+
+
+def test_one_interval_is_sent_as_one_digest(posts, make_handler):
+    handler = make_handler()
+    log(handler, 'первая', 'вторая', 'вторая')
+    handler.flush()
+    assert [text for _, text in posts.calls] == [
+        'первая\n\n[повторов: 2]\nвторая'
+    ]
+
+
+def test_retry_after_is_honoured(posts, make_handler):
+    posts.responses.append(FakeResponse(429, retry_after=0.3))
+    handler = make_handler()
+    log(handler, 'запись')
+    handler.flush()
+    (first, text), (second, retried) = posts.calls
+    assert text == retried == 'запись'
+    assert second - first >= 0.3
+
+
+def test_dropped_records_are_reported(posts, make_handler):
+    handler = make_handler(queue_size=2)
+    posts.release.clear()
+    log(handler, 'первая')
+    assert posts.entered.wait(2)
+    # Поток отправки занят: очередь из двух записей переполняется
+    log(handler, *(f'запись {i}' for i in range(5)))
+    assert handler.dropped == 3
+    posts.release.set()
+    handler.flush()
+    assert posts.calls[-1][1].endswith(
+        'Отброшено записей при переполнении: 3'
+    )
+    assert handler.dropped == 0
+
+
+def test_close_returns_within_timeout(posts, make_handler):
+    handler = make_handler(queue_size=1, timeout=0.3)
+    posts.release.clear()
+    log(handler, 'первая')
+    assert posts.entered.wait(2)
+    log(handler, 'вторая')
+    start = time.monotonic()
+    handler.close()
+    assert time.monotonic() - start < 1
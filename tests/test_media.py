@@ -0,0 +1,50 @@
+import os
+import time
+
+import pytest
+from django.core.files.base import ContentFile
+
+from recipes.images import delete_unreferenced
+from recipes.models import Recipe
+
+
+@pytest.fixture
+def storage():
+    return Recipe._meta.get_field('image').storage
+
+
+def make_old(storage, name):
+    old = time.time() - 24 * 60 * 60
+    os.utime(storage.path(name), (old, old))
+
+
+def test_same_content_saved_once(storage):
+    first = storage.save('recipes/images/a.png', ContentFile(b'image'))
+    second = storage.save('recipes/images/b.png', ContentFile(b'image'))
+    assert first == second
+    assert first.startswith('recipes/')
+    assert first.endswith('.png')
+    assert storage.save(
+        'recipes/images/c.png', ContentFile(b'other')
+    ) != first
+
+
+def test_repeated_upload_refreshes_modified_time(storage):
+    name = storage.save('recipes/images/a.png', ContentFile(b'image'))
+    make_old(storage, name)
+    storage.save('recipes/images/b.png', ContentFile(b'image'))
+    assert time.time() - os.path.getmtime(storage.path(name)) < 60
+
+
+@pytest.mark.django_db
+def test_delete_unreferenced_keeps_recent_files(storage):
+    old = storage.save('recipes/images/a.png', ContentFile(b'old'))
+    make_old(storage, old)
+    # Тот же файл только что загружен другим запросом, который ещё
+    # не сохранил рецепт.
+    shared = storage.save('recipes/images/b.png', ContentFile(b'shared'))
+    make_old(storage, shared)
+    storage.save('recipes/images/c.png', ContentFile(b'shared'))
+    delete_unreferenced([old, shared])
+    assert not storage.exists(old)
+    assert storage.exists(shared)
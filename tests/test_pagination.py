@@ -0,0 +1,165 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from recipes.models import Favorite, Recipe
+from users.models import Follow
+
+URL = '/api/recipes/'
+
+
+def count_statements(client, params=None):
+    with CaptureQueriesContext(connection) as context:
+        response = client.get(URL, params or {})
+    assert response.status_code == 200
+    return response.json()['count'], [
+        query['sql'] for query in context.captured_queries
+        if query['sql'].startswith('SELECT COUNT(*)')
+    ]
+
+
+@pytest.mark.django_db
+def test_page_count_cache_is_shared_between_users(
+    user_client, author, make_recipe
+):
+    for i in range(8):
+        make_recipe(name=f'Рецепт {i}')
+    author_client = APIClient()
+    author_client.force_authenticate(author)
+    count, statements = count_statements(user_client)
+    assert count == 8
+    assert len(statements) == 1
+    assert 'EXISTS' not in statements[0]
+    assert count_statements(author_client) == (8, [])
+    assert count_statements(
+        author_client, {'ordering': 'popular', 'popular_days': 7}
+    ) == (8, [])
+
+
+@pytest.mark.django_db
+def test_page_count_keeps_filters(user, user_client, make_recipe):
+    for i in range(3):
+        make_recipe(name=f'Рецепт {i}')
+    user_client.post(f'{URL}{make_recipe().id}/favorite/')
+    count, _ = count_statements(user_client, {'is_favorited': 1})
+    assert count == 1
+    count, _ = count_statements(user_client)
+    assert count == 4
+
+
+def page(client, number, params=None):
+    response = client.get(URL, {'limit': 3, 'page': number, **(params or {})})
+    return response.status_code, response.json()
+
+
+@pytest.mark.django_db
+def test_page_count_follows_deleted_rows(user_client, make_recipe):
+    recipes = [make_recipe(name=f'Рецепт {i}') for i in range(8)]
+    status, data = page(user_client, 3)
+    assert (status, data['count'], len(data['results'])) == (200, 8, 2)
+    for recipe in recipes[:3]:
+        recipe.delete()
+    status, data = page(user_client, 2)
+    assert (status, data['count'], len(data['results'])) == (200, 5, 2)
+    assert page(user_client, 3)[0] == 404
+
+
+@pytest.mark.django_db
+def test_page_beyond_stale_count_is_recounted(
+    author, user_client, make_recipe
+):
+    for i in range(6):
+        make_recipe(name=f'Рецепт {i}')
+    assert page(user_client, 1)[1]['count'] == 6
+    # bulk_create не отправляет сигналов: штамп версии не меняется,
+    # как если бы запись пришла из процесса с отстающим штампом.
+    Recipe.objects.bulk_create(
+        Recipe(author=author, name=f'Новый {i}', text='Описание',
+               cooking_time=5)
+        for i in range(2)
+    )
+    status, data = page(user_client, 3)
+    assert (status, data['count'], len(data['results'])) == (200, 8, 2)
+
+
+@pytest.mark.django_db
+def test_favorite_count_follows_user_data(user, user_client, make_recipe):
+    first, second = make_recipe(name='Первый'), make_recipe(name='Второй')
+    Favorite.objects.create(user=user, recipe=first)
+    assert page(user_client, 1, {'is_favorited': 1})[1]['count'] == 1
+    Favorite.objects.create(user=user, recipe=second)
+    assert page(user_client, 1, {'is_favorited': 1})[1]['count'] == 2
+    Favorite.objects.filter(user=user).delete()
+    assert page(user_client, 1, {'is_favorited': 1})[1]['count'] == 0
+
+
+@pytest.mark.django_db
+def test_subscription_count_follows_follows(
+    user, user_client, make_users
+):
+    authors = make_users(4, prefix='chef')
+    for author in authors[:3]:
+        Follow.objects.create(user=user, author=author)
+    url = '/api/users/subscriptions/'
+    assert user_client.get(url).json()['count'] == 3
+    Follow.objects.create(user=user, author=authors[3])
+    assert user_client.get(url).json()['count'] == 4
+    Follow.objects.filter(user=user, author=authors[0]).delete()
+    assert user_client.get(url).json()['count'] == 3
+
+
+def read_cursor_pages(client, params):
+    """Идёт по ссылкам next, затем обратно по previous."""
+    pages, response = [], client.get(URL, {**params, 'cursor': ''})
+    while True:
+        assert response.status_code == 200
+        data = response.json()
+        pages.append([recipe['id'] for recipe in data['results']])
+        if not data['next']:
+            break
+        response = client.get(data['next'])
+    backward = [pages[-1]]
+    while data['previous']:
+        data = client.get(data['previous']).json()
+        backward.append([recipe['id'] for recipe in data['results']])
+    return pages, backward[::-1]
+
+
+@pytest.fixture
+def tied_recipes(make_recipe):
+    recipes = [make_recipe(name=f'Рецепт {i}') for i in range(9)]
+    # Одинаковые время готовки и дата публикации у групп рецептов
+    for times, recipe in zip([5, 5, 5, 5, 10, 10, 10, 1, 5], recipes):
+        Recipe.objects.filter(pk=recipe.pk).update(cooking_time=times)
+    Recipe.objects.filter(pk__in=[r.pk for r in recipes[:6]]).update(
+        pub_date=recipes[0].pub_date
+    )
+    return recipes
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('ordering', [None, 'quickest', 'popular'])
+def test_cursor_pages_through_ties(user_client, tied_recipes, ordering):
+    params = {'limit': 2, **({'ordering': ordering} if ordering else {})}
+    expected = [
+        recipe['id'] for recipe in
+        user_client.get(URL, {**params, 'limit': 20}).json()['results']
+    ]
+    pages, backward = read_cursor_pages(user_client, params)
+    assert sum(pages, []) == expected
+    assert backward == pages
+
+
+@pytest.mark.django_db
+def test_cursor_rejects_annotation_ordering(user_client, tied_recipes):
+    response = user_client.get(
+        URL, {'ordering': 'popular', 'popular_days': 7, 'cursor': ''}
+    )
+    assert response.status_code == 400
+    assert 'cursor' in response.json()
+
+
+@pytest.mark.django_db
+def test_invalid_cursor(user_client, tied_recipes):
+    assert user_client.get(URL, {'cursor': 'garbage'}).status_code == 404
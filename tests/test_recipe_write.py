@@ -0,0 +1,135 @@
+import base64
+import io
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from PIL import Image
+
+from recipes.models import Ingredient, IngredientAmount, Recipe
+
+URL = '/api/recipes/'
+
+
+def png():
+    buffer = io.BytesIO()
+    Image.new('RGB', (4, 4), 'red').save(buffer, 'PNG')
+    return ('data:image/png;base64,'
+            + base64.b64encode(buffer.getvalue()).decode())
+
+
+@pytest.fixture
+def many_ingredients(db):
+    return [
+        Ingredient.objects.create(name=f'Специя {i}', measurement_unit='г')
+        for i in range(40)
+    ]
+
+
+def recipe_data(tags, ingredients, name='Рецепт', amount=2):
+    return {
+        'name': name, 'text': 'Описание', 'cooking_time': 5,
+        'image': png(), 'tags': [tag.id for tag in tags],
+        'ingredients': [
+            {'id': ingredient.id, 'amount': amount}
+            for ingredient in ingredients
+        ],
+    }
+
+
+def stored_amounts(recipe_id):
+    return dict(
+        IngredientAmount.objects.filter(recipe_id=recipe_id)
+        .values_list('ingredient_id', 'amount')
+    )
+
+
+@pytest.mark.django_db
+def test_create_queries_do_not_depend_on_ingredients(
+    user_client, tags, many_ingredients, count_queries
+):
+    def create(name, ingredients):
+        return count_queries(
+            user_client.post, URL,
+            recipe_data(tags, ingredients, name=name), format='json'
+        )
+
+    single = create('Один', many_ingredients[:1])
+    assert create('Сорок', many_ingredients) == single
+    recipe = Recipe.objects.get(name='Сорок')
+    assert stored_amounts(recipe.id) == {
+        ingredient.id: 2 for ingredient in many_ingredients
+    }
+
+
+@pytest.mark.django_db
+def test_update_writes_only_changed_ingredients(
+    user_client, tags, many_ingredients
+):
+    user_client.post(
+        URL, recipe_data(tags, many_ingredients[:30]), format='json'
+    )
+    recipe_id = Recipe.objects.get().id
+    rows = set(
+        IngredientAmount.objects.filter(recipe_id=recipe_id)
+        .values_list('id', flat=True)
+    )
+
+    data = recipe_data(tags, many_ingredients[5:35])
+    data['ingredients'][0]['amount'] = 7
+    response = user_client.patch(f'{URL}{recipe_id}/', data, format='json')
+    assert response.status_code == 200
+    expected = {ingredient.id: 2 for ingredient in many_ingredients[5:35]}
+    expected[many_ingredients[5].id] = 7
+    assert stored_amounts(recipe_id) == expected
+    kept = set(
+        IngredientAmount.objects.filter(recipe_id=recipe_id)
+        .values_list('id', flat=True)
+    )
+    assert len(rows & kept) == 25
+
+    with CaptureQueriesContext(connection) as context:
+        response = user_client.patch(
+            f'{URL}{recipe_id}/', {'name': 'Новое название'}, format='json'
+        )
+    assert response.status_code == 200
+    assert not [
+        query['sql'] for query in context.captured_queries
+        if 'recipes_ingredientamount' in query['sql']
+        and not query['sql'].startswith('SELECT')
+    ]
+    assert stored_amounts(recipe_id) == expected
+
+
+@pytest.mark.django_db
+def test_ingredient_and_tag_ids_checked_in_one_query(
+    user_client, tags, many_ingredients
+):
+    with CaptureQueriesContext(connection) as context:
+        response = user_client.post(
+            URL, recipe_data(tags, many_ingredients), format='json'
+        )
+    assert response.status_code == 201
+    lookups = [
+        query['sql'] for query in context.captured_queries
+        if '"recipes_ingredient"."id" ' in query['sql'].split('WHERE')[-1]
+        or '"recipes_tag"."id" ' in query['sql'].split('WHERE')[-1]
+    ]
+    assert len(lookups) == 2
+
+
+@pytest.mark.django_db
+def test_all_missing_ids_reported_at_once(
+    user_client, tags, many_ingredients
+):
+    data = recipe_data(tags, many_ingredients[:2])
+    data['ingredients'] += [
+        {'id': 9998, 'amount': 1}, {'id': 9999, 'amount': 1}
+    ]
+    data['tags'] += [777, 778]
+    response = user_client.post(URL, data, format='json')
+    assert response.status_code == 400
+    errors = str(response.json())
+    for missing in ('9998', '9999', '777', '778'):
+        assert missing in errors
+    assert not Recipe.objects.exists()
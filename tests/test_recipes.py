@@ -0,0 +1,117 @@
+from datetime import timedelta
+
+import pytest
+from django.core.cache import cache
+from django.utils import timezone
+
+from recipes.models import Favorite, ShoppingCart
+from users.models import Follow
+
+URL = '/api/recipes/'
+
+
+def list_queries(client, count_queries):
+    # Число записей страницы кешируется: иначе первый запрос
+    # посчитал бы его, а второй нет.
+    cache.clear()
+    return count_queries(client.get, URL)
+
+
+@pytest.mark.django_db
+def test_recipe_list_flags(user, author, user_client, make_recipe):
+    favorite, in_cart, plain = (
+        make_recipe(name=name) for name in ('Избранный', 'В корзине', 'Нет')
+    )
+    Favorite.objects.create(user=user, recipe=favorite)
+    ShoppingCart.objects.create(user=user, recipe=in_cart)
+    Follow.objects.create(user=user, author=author)
+    response = user_client.get(URL)
+    assert response.status_code == 200
+    flags = {
+        recipe['id']: (recipe['is_favorited'], recipe['is_in_shopping_cart'],
+                       recipe['author']['is_subscribed'])
+        for recipe in response.json()['results']
+    }
+    assert flags == {
+        favorite.id: (True, False, True),
+        in_cart.id: (False, True, True),
+        plain.id: (False, False, True),
+    }
+
+
+@pytest.mark.django_db
+def test_recipe_list_flags_do_not_add_queries(
+    user, user_client, make_recipe, count_queries
+):
+    recipe = make_recipe()
+    Favorite.objects.create(user=user, recipe=recipe)
+    ShoppingCart.objects.create(user=user, recipe=recipe)
+    single = list_queries(user_client, count_queries)
+    for i in range(5):
+        recipe = make_recipe(name=f'Рецепт {i}')
+        Favorite.objects.create(user=user, recipe=recipe)
+        ShoppingCart.objects.create(user=user, recipe=recipe)
+    assert list_queries(user_client, count_queries) == single
+
+
+@pytest.mark.django_db
+def test_recipe_list_queries_do_not_depend_on_page_size(
+    user_client, make_recipe, count_queries
+):
+    make_recipe()
+    single = list_queries(user_client, count_queries)
+    for i in range(5):
+        make_recipe(name=f'Рецепт {i}')
+    assert list_queries(user_client, count_queries) == single
+
+
+@pytest.mark.django_db
+def test_recipe_detail_and_favorite_queries(
+    user_client, make_recipe, ingredients, count_queries
+):
+    small = make_recipe(name='Маленький')
+    small.ingredient.exclude(ingredient=ingredients[0]).delete()
+    large = make_recipe(name='Большой')
+    # Первый запрос загружает справочник тегов.
+    user_client.get(URL)
+    detail = [
+        count_queries(user_client.get, f'{URL}{recipe.id}/')
+        for recipe in (small, large)
+    ]
+    assert detail[0] == detail[1]
+    favorite = [
+        count_queries(user_client.post, f'{URL}{recipe.id}/favorite/')
+        for recipe in (small, large)
+    ]
+    assert favorite[0] == favorite[1]
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('days', ['0', '366', '1000000', 'abc'])
+def test_popular_days_out_of_range(client, days):
+    response = client.get(URL, {'ordering': 'popular', 'popular_days': days})
+    assert response.status_code == 400
+    assert 'popular_days' in response.json()
+
+
+@pytest.mark.django_db
+def test_popular_ordering_counts_recent_favorites(
+    user, author, client, make_recipe
+):
+    old, recent = make_recipe(name='Старый'), make_recipe(name='Новый')
+    Favorite.objects.create(user=author, recipe=old)
+    Favorite.objects.filter(recipe=old).update(
+        when_added=timezone.now() - timedelta(days=30)
+    )
+    Favorite.objects.create(user=user, recipe=recent)
+    Favorite.objects.create(user=user, recipe=old)
+    response = client.get(
+        URL, {'ordering': 'popular', 'popular_days': 365}
+    )
+    assert [recipe['name'] for recipe in response.json()['results']] == [
+        'Старый', 'Новый'
+    ]
+    response = client.get(URL, {'ordering': 'popular', 'popular_days': 7})
+    assert [recipe['name'] for recipe in response.json()['results']] == [
+        'Новый', 'Старый'
+    ]
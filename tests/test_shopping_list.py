@@ -0,0 +1,34 @@
+import pytest
+
+from recipes.models import ShoppingCart
+
+URL = '/api/recipes/download_shopping_cart/'
+
+
+def fill_cart(user, make_recipe, count):
+    for i in range(count):
+        ShoppingCart.objects.create(
+            user=user, recipe=make_recipe(name=f'Рецепт {i}')
+        )
+
+
+@pytest.mark.django_db
+def test_shopping_list_sums_amounts(user, user_client, make_recipe):
+    fill_cart(user, make_recipe, 3)
+    response = user_client.get(URL)
+    assert response.status_code == 200
+    lines = b''.join(response.streaming_content).decode().splitlines()
+    assert len(lines) == 5
+    assert lines[0] == '1. Продукт 0 (г) - 30'
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('export_format', ['txt', 'csv', 'pdf'])
+def test_shopping_list_queries_do_not_depend_on_cart_size(
+    user, user_client, make_recipe, count_queries, export_format
+):
+    fill_cart(user, make_recipe, 1)
+    single = count_queries(user_client.get, URL, {'format': export_format})
+    fill_cart(user, make_recipe, 10)
+    many = count_queries(user_client.get, URL, {'format': export_format})
+    assert single == many
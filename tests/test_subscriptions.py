@@ -0,0 +1,57 @@
+import pytest
+from django.core.cache import cache
+
+from users.models import Follow
+
+URL = '/api/users/subscriptions/'
+
+
+def subscribe(user, make_users, make_recipe, count, prefix='chef'):
+    authors = make_users(count, prefix=prefix)
+    Follow.objects.bulk_create(
+        Follow(user=user, author=author) for author in authors
+    )
+    for author in authors:
+        for i in range(3):
+            make_recipe(author=author, name=f'{author.username} {i}')
+    return authors
+
+
+@pytest.mark.django_db
+def test_subscriptions_counts_and_recipes_limit(
+    user, user_client, make_users, make_recipe
+):
+    subscribe(user, make_users, make_recipe, 2)
+    response = user_client.get(URL, {'recipes_limit': 2})
+    assert response.status_code == 200
+    for author in response.json()['results']:
+        assert author['is_subscribed'] is True
+        assert author['recipes_count'] == 3
+        assert [recipe['name'] for recipe in author['recipes']] == [
+            f"{author['username']} 2", f"{author['username']} 1"
+        ]
+
+
+@pytest.mark.django_db
+def test_subscriptions_zero_recipes_limit(user, user_client, make_users,
+                                          make_recipe):
+    subscribe(user, make_users, make_recipe, 2)
+    response = user_client.get(URL, {'recipes_limit': 0})
+    assert response.status_code == 200
+    for author in response.json()['results']:
+        assert author['recipes_count'] == 3
+        assert author['recipes'] == []
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('params', [{}, {'recipes_limit': 2}])
+def test_subscriptions_queries_do_not_depend_on_page_size(
+    user, user_client, make_users, make_recipe, count_queries, params
+):
+    subscribe(user, make_users, make_recipe, 1)
+    cache.clear()
+    single = count_queries(user_client.get, URL, params)
+    Follow.objects.filter(user=user).delete()
+    subscribe(user, make_users, make_recipe, 5, prefix='cook')
+    cache.clear()
+    assert count_queries(user_client.get, URL, params) == single
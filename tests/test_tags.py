@@ -0,0 +1,64 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from recipes import tag_catalog
+from recipes.models import Tag
+
+URL = '/api/recipes/'
+
+
+def create_elsewhere(name, slug):
+    """Тег, созданный другим процессом: без сигналов в этом процессе."""
+    Tag.objects.bulk_create([Tag(name=name, color='#FF0000', slug=slug)])
+    return Tag.objects.get(slug=slug)
+
+
+@pytest.mark.django_db
+def test_filter_by_tag_from_other_process(client, make_recipe):
+    make_recipe()
+    assert client.get(URL, {'tags': 'tag0'}).json()['count'] == 1
+    tag = create_elsewhere('Новый', 'new')
+    recipe = make_recipe(name='С новым тегом')
+    recipe.tags.set([tag])
+    response = client.get(URL, {'tags': 'new'})
+    assert response.status_code == 200
+    assert [item['name'] for item in response.json()['results']] == [
+        'С новым тегом'
+    ]
+    assert client.get(URL, {'tags': 'missing'}).status_code == 400
+
+
+@pytest.mark.django_db
+def test_recipe_shows_tag_from_other_process(client, make_recipe, tags):
+    recipe = make_recipe()
+    client.get(f'{URL}{recipe.id}/')
+    tag = create_elsewhere('Новый', 'new')
+    recipe.tags.add(tag)
+    response = client.get(f'{URL}{recipe.id}/')
+    assert {item['slug'] for item in response.json()['tags']} == {
+        'tag0', 'tag1', 'new'
+    }
+
+
+def reloads_catalog(client, params):
+    with CaptureQueriesContext(connection) as context:
+        assert client.get(URL, params).status_code == 400
+    return any(
+        'FROM "recipes_tag"' in query['sql']
+        for query in context.captured_queries
+    )
+
+
+@pytest.mark.django_db
+def test_missing_tag_reloads_catalog_once_per_interval(
+    client, tags, monkeypatch
+):
+    now = tag_catalog.time.monotonic()
+    monkeypatch.setattr(tag_catalog.time, 'monotonic', lambda: now)
+    client.get(URL)
+    assert reloads_catalog(client, {'tags': 'missing'})
+    assert not reloads_catalog(client, {'tags': 'missing'})
+    assert not reloads_catalog(client, {'tags': 'other'})
+    now += tag_catalog.TagCatalog.FORCED_RELOAD_INTERVAL
+    assert reloads_catalog(client, {'tags': 'missing'})